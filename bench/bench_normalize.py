@@ -0,0 +1,111 @@
+# bench/bench_normalize.py
+"""
+Pathological-input corpus and throughput benchmark for utils.normalize.
+
+Run from the repository root:
+
+    python -m bench.bench_normalize --size-mb 1 --max-seconds-per-mb 5
+
+Exits non-zero if any corpus takes longer than the per-MB bound, or if any of the
+REPAIR_CASES comes out wrong, so it can gate releases.
+"""
+import argparse
+import json
+import random
+import sys
+import time
+
+from utils.normalize import normalize_text
+
+
+def _repeat_to_size(unit: str, size: int) -> str:
+    return (unit * (size // len(unit) + 1))[:size]
+
+
+def pathological_corpus(size: int, seed: int = 0) -> dict:
+    """Inputs that made the old regex chain backtrack or blow up, each about ``size`` characters."""
+    rng = random.Random(seed)
+    words = ["python", "kubernetes", "led", "team", "of", "engineers", "built", "pipeline", "2019", "AWS"]
+    prose = ' '.join(rng.choice(words) for _ in range(size // 6))[:size]
+    return {
+        # One URL followed by a whole document of space-separated tokens (old URL pattern)
+        "url_then_tokens": "https:// " + _repeat_to_size("ab cd ", size),
+        # Deeply slashed paths separated by whitespace (old path pattern)
+        "slashed_paths": _repeat_to_size("/a/b/c ", size),
+        # Whitespace-heavy extraction: long runs of spaces and tabs between characters
+        "whitespace_heavy": _repeat_to_size("x \t   \t  ", size),
+        # Overspaced letters with no terminator
+        "overspaced_letters": _repeat_to_size("a ", size),
+        # Dots and spaces that look like overspaced text and emails at once
+        "dots_and_spaces": _repeat_to_size("a . b . ", size),
+        # Near-miss emails that never complete
+        "at_signs": _repeat_to_size("name @ host . ", size),
+        # A single enormous line with no whitespace at all
+        "one_long_token": "x" * size,
+        # URLs followed by separators or plain words, which must stay apart from them
+        "url_separators": _repeat_to_size("https://github.com/jane - Portfolio | linkedin.com/in/ jane-doe — ", size),
+        "url_then_words": _repeat_to_size("https://example.com/jane/ for roles /srv/app/ for details ", size),
+        # One URL continued by a long run of short slashed pieces
+        "url_slash_chain": "https:// x.com/" + _repeat_to_size("p/ 1/ ", size),
+        # Realistic prose with bullets and blank lines
+        "prose_with_bullets": '\n'.join(f"• {line}" if i % 3 else "\n" for i, line in
+                                        enumerate(prose[k:k + 80] for k in range(0, len(prose), 80))),
+    }
+
+
+# (input, expected normalize_text output) pairs checked before timing
+REPAIR_CASES = [
+    ("https:// github.com/ user", "https://github.com/user"),
+    ("linkedin.com/in/ jane-doe", "linkedin.com/in/jane-doe"),
+    ("www. example. com/path", "https://www.example.com/path"),
+    ("jane @ example . com", "jane@example.com"),
+    ("https://github.com/jane - Portfolio", "https://github.com/jane - Portfolio"),
+    ("GitHub: github.com/jane | LinkedIn: linkedin.com/in/jane", "GitHub: github.com/jane | LinkedIn: linkedin.com/in/jane"),
+    ("Portfolio: https://example.com/jane/ for roles", "Portfolio: https://example.com/jane/ for roles"),
+    ("code in /srv/app/ for details", "code in /srv/app/ for details"),
+]
+
+
+def check_repairs() -> list:
+    """REPAIR_CASES that normalize_text gets wrong, as (input, expected, actual)."""
+    return [(text, expected, normalize_text(text)) for text, expected in REPAIR_CASES
+            if normalize_text(text) != expected]
+
+
+def run(size_mb: float, max_seconds_per_mb: float, repeat: int) -> dict:
+    size = int(size_mb * 1024 * 1024)
+    results = {}
+    for name, text in pathological_corpus(size).items():
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            normalize_text(text)
+            best = min(best, time.perf_counter() - start)
+        mb = len(text.encode('utf-8')) / (1024 * 1024)
+        results[name] = {"mb": round(mb, 3), "seconds": round(best, 4), "seconds_per_mb": round(best / mb, 4),
+                         "ok": best / mb <= max_seconds_per_mb}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark normalize_text on pathological inputs.")
+    parser.add_argument("--size-mb", type=float, default=1.0, help="Approximate size of each corpus (default: 1)")
+    parser.add_argument("--max-seconds-per-mb", type=float, default=5.0, help="Fail if any corpus is slower than this (default: 5)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per corpus; the best time is reported (default: 3)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+    wrong = check_repairs()
+    for text, expected, actual in wrong:
+        print(f"Wrong repair: {text!r} -> {actual!r}, expected {expected!r}", file=sys.stderr)
+    results = run(args.size_mb, args.max_seconds_per_mb, args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for name, r in results.items():
+            status = "ok" if r["ok"] else "SLOW"
+            print(f"{name:<22} {r['mb']:>7.2f} MB {r['seconds']:>8.3f} s {r['seconds_per_mb']:>8.3f} s/MB  {status}")
+    sys.exit(0 if all(r["ok"] for r in results.values()) and not wrong else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# bench/bench_onnx.py
+"""
+Throughput and similarity drift of the int8 ONNX embedder against the torch backend.
+
+Run from the repository root:
+
+    python -m bench.bench_onnx --model all-MiniLM-L6-v2 --onnx-dir .cache/onnx/all-MiniLM-L6-v2 --sentences 5000 --threads 4
+
+Exports the model first if --onnx-dir has no export yet. Both backends embed the same
+synthetic resume lines and job postings; the report gives sentences/sec for each, the
+cosine similarity between the two embeddings of every sentence, and how often the
+top-k resume sections chosen for a job change when scores come from the ONNX model.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from bench.synth import synthetic_job, synthetic_resume
+from utils.onnx_embedder import ONNX_CONFIG_FILE, OnnxEmbedder, export_onnx_model
+
+
+def _sentences(count: int, seed: int) -> list:
+    lines = []
+    n = 0
+    while len(lines) < count:
+        text = synthetic_resume(4, seed + n) + synthetic_job(n, seed)
+        lines += [line.strip("#-• ") for line in text.split('\n') if len(line.strip()) > 20]
+        n += 1
+    return lines[:count]
+
+
+def _throughput(encode, sentences: list, batch_size: int, repeats: int) -> tuple:
+    encode(sentences[:batch_size], batch_size=batch_size)  # warm-up: first calls allocate and tune kernels
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        embeddings = encode(sentences, batch_size=batch_size, convert_to_numpy=True, normalize_embeddings=True)
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return np.asarray(embeddings, dtype=np.float32), best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the ONNX int8 embedder with the torch embedder.")
+    parser.add_argument("--model", type=str, default="all-MiniLM-L6-v2", help="Sentence-transformers model (default: all-MiniLM-L6-v2)")
+    parser.add_argument("--onnx-dir", type=str, default=".cache/onnx/all-MiniLM-L6-v2", help="Exported model directory; exported here if missing")
+    parser.add_argument("--sentences", type=int, default=2000, help="Sentences to embed (default: 2000)")
+    parser.add_argument("--batch-size", type=int, default=64, help="Sentences per encode batch (default: 64)")
+    parser.add_argument("--threads", type=int, default=0, help="CPU threads for both backends (default: 0, library default)")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per backend; the fastest is reported (default: 3)")
+    parser.add_argument("--top-k", type=int, default=8, help="Sections compared per job for ranking drift (default: 8)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the corpus (default: 0)")
+    parser.add_argument("--out", type=str, default="bench_onnx.json", help="JSON results file (default: bench_onnx.json)")
+    args = parser.parse_args()
+
+    if not os.path.isfile(os.path.join(args.onnx_dir, ONNX_CONFIG_FILE)):
+        print(f"Exporting {args.model} to {args.onnx_dir}...", file=sys.stderr)
+        export_onnx_model(args.model, args.onnx_dir)
+    import torch
+    from sentence_transformers import SentenceTransformer
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    torch_model = SentenceTransformer(args.model, device='cpu')
+    onnx_model = OnnxEmbedder(args.onnx_dir, threads=args.threads or None)
+
+    sentences = _sentences(args.sentences, args.seed)
+    torch_embs, torch_seconds = _throughput(torch_model.encode, sentences, args.batch_size, args.repeats)
+    onnx_embs, onnx_seconds = _throughput(onnx_model.encode, sentences, args.batch_size, args.repeats)
+    cosine = np.sum(torch_embs * onnx_embs, axis=1)
+
+    # Ranking drift: score jobs against resume sections with each backend, as utils.rag does
+    from utils.rag import segment_resume, top_k_indices
+    sections, _ = segment_resume(synthetic_resume(20, args.seed))
+    jobs = [synthetic_job(i, args.seed) for i in range(200)]
+    scores = {}
+    for name, model in (("torch", torch_model), ("onnx", onnx_model)):
+        section_embs = np.asarray(model.encode(sections, normalize_embeddings=True), dtype=np.float32)
+        job_embs = np.asarray(model.encode(jobs, batch_size=args.batch_size, normalize_embeddings=True), dtype=np.float32)
+        scores[name] = job_embs @ section_embs.T
+    torch_top = top_k_indices(scores["torch"], args.top_k).tolist()
+    onnx_top = top_k_indices(scores["onnx"], args.top_k).tolist()
+    overlaps = [len(set(a) & set(b)) / max(len(a), 1) for a, b in zip(torch_top, onnx_top)]
+    score_drift = np.abs(scores["torch"] - scores["onnx"])
+
+    results = {
+        "meta": {"model": args.model, "onnx_dir": args.onnx_dir, "sentences": len(sentences),
+                 "batch_size": args.batch_size, "threads": args.threads or None, "sections": len(sections)},
+        "torch": {"seconds": round(torch_seconds, 4), "sentences_per_second": round(len(sentences) / torch_seconds, 1)},
+        "onnx": {"seconds": round(onnx_seconds, 4), "sentences_per_second": round(len(sentences) / onnx_seconds, 1)},
+        "speedup": round(torch_seconds / onnx_seconds, 2),
+        "drift": {
+            "cosine_mean": round(float(cosine.mean()), 5),
+            "cosine_p1": round(float(np.percentile(cosine, 1)), 5),
+            "cosine_min": round(float(cosine.min()), 5),
+            "score_abs_diff_mean": round(float(score_drift.mean()), 5),
+            "score_abs_diff_max": round(float(score_drift.max()), 5),
+            "top_k_overlap": round(float(np.mean(overlaps)), 4),
+        },
+    }
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"torch {results['torch']['sentences_per_second']} sentences/s, onnx {results['onnx']['sentences_per_second']} "
+          f"sentences/s ({results['speedup']}x); cosine to torch mean {results['drift']['cosine_mean']}, "
+          f"min {results['drift']['cosine_min']}; top-{args.top_k} overlap {results['drift']['top_k_overlap']}; wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+# bench/bench_pipeline.py
+"""
+End-to-end pipeline benchmark on a synthetic corpus against the local mock OpenAI server.
+
+Run from the repository root:
+
+    python -m bench.bench_pipeline --pages 20 --formats md pdf docx --jobs 200 --concurrency 8 --out bench_pipeline.json
+
+Times each stage (parse, clean, segment, embed, prompt, llm, render) separately and writes
+the results as JSON, tagged with the git revision, so runs from different releases can be
+compared. No API key or network access is needed unless --base-url points elsewhere.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bench.mock_openai import start_mock_server
+from bench.synth import generate_corpus
+from utils.llm import BASE_URL_ENV, call_ai_provider, configure_openai_client, prompt_cache_stats
+from utils.parser import clean_content
+from utils.prompt import PROMPT_LAYOUTS
+from utils.rag import RETRIEVERS
+
+
+def _extract_raw(path: str) -> str:
+    """Text of one input file before cleaning."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".pdf":
+        from PyPDF2 import PdfReader
+        return "".join(page.extract_text() or "" for page in PdfReader(path).pages)
+    if ext == ".docx":
+        from main import extract_docx_text
+        return extract_docx_text(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class StageTimer:
+    """Collects wall time and item counts per stage; stage output (debug prints) is swallowed."""
+
+    def __init__(self, verbose: bool = False):
+        self.stages = {}
+        self.verbose = verbose
+
+    @contextlib.contextmanager
+    def stage(self, name: str, items: int):
+        sink = contextlib.nullcontext() if self.verbose else contextlib.redirect_stdout(io.StringIO())
+        start = time.perf_counter()
+        with sink:
+            yield
+        seconds = time.perf_counter() - start
+        self.stages[name] = {"seconds": round(seconds, 4), "items": items,
+                             "ms_per_item": round(seconds * 1000 / items, 3) if items else None}
+        print(f"{name:<8} {seconds:>9.3f} s  {items:>6} items", file=sys.stderr)
+
+
+def run(args) -> dict:
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="resume-bench-")
+    in_dir, jobs_dir = generate_corpus(work_dir, args.pages, args.formats, args.jobs, args.seed)
+    output_dir = os.path.join(work_dir, "out")
+    os.makedirs(output_dir, exist_ok=True)
+    timer = StageTimer(args.verbose)
+    errors = {}
+
+    resume_paths = [os.path.join(in_dir, f) for f in sorted(os.listdir(in_dir))]
+    job_paths = [os.path.join(jobs_dir, f) for f in sorted(os.listdir(jobs_dir))]
+    with timer.stage("parse", len(resume_paths) + len(job_paths)):
+        raw_resumes = [_extract_raw(p) for p in resume_paths]
+        raw_jobs = [_extract_raw(p) for p in job_paths]
+    with timer.stage("clean", len(raw_resumes) + len(raw_jobs)):
+        combined_resume = '\n'.join(clean_content(text).strip() for text in raw_resumes)
+        jobs = [(os.path.basename(p), clean_content(text)) for p, text in zip(job_paths, raw_jobs)]
+
+    from main import build_job_prompt, extract_resume_html, render_job_pdf
+    from utils.rag import build_resume_index, configure_retriever, get_embedder, rank_sections_batch, segment_resume
+    configure_retriever(args.retriever)
+    with timer.stage("segment", 1):
+        sections, _ = segment_resume(combined_resume)
+    with timer.stage("model", 1):
+        if args.retriever == "embedding":
+            get_embedder()
+    with timer.stage("embed", len(jobs)):
+        # The index re-segments the resume; that is small next to the embedding calls
+        index = build_resume_index(combined_resume)
+        ranked = rank_sections_batch(index, [text for _, text in jobs], batch_size=args.embed_batch_size)
+    with timer.stage("prompt", len(jobs)):
+        prompts = [build_job_prompt(combined_resume, text, args.model, index=index, relevant_sections=sections_for_job,
+                                    layout=args.prompt_layout)
+                   for (_, text), sections_for_job in zip(jobs, ranked)]
+
+    server = None
+    if args.base_url:
+        os.environ[BASE_URL_ENV] = args.base_url
+    else:
+        server = start_mock_server(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, seed=args.seed,
+                                   chunk_delay=args.chunk_delay)
+        os.environ[BASE_URL_ENV] = server.base_url
+    configure_openai_client(pool_size=args.concurrency, backoff_base=args.backoff_base)
+    api_key = os.environ.get("OPENAI_API_KEY", "mock")
+
+    def generate(job_name, prompt):
+        try:
+            return extract_resume_html(call_ai_provider(prompt, "openai", api_key, args.model, stream=args.stream), args.model)
+        except Exception as e:
+            errors[job_name] = str(e)
+            return None
+
+    try:
+        with timer.stage("llm", len(jobs)):
+            with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+                htmls = list(pool.map(generate, [name for name, _ in jobs], prompts))
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+    rendered = [(name, html) for (name, _), html in zip(jobs, htmls) if html is not None]
+    render_pool = None
+    if args.render_workers > 0:
+        from utils.pdf import RenderPool
+        render_pool = RenderPool(args.render_workers)
+    try:
+        with timer.stage("render", len(rendered)):
+            with ThreadPoolExecutor(max_workers=max(1, args.render_workers)) as pool:
+                list(pool.map(lambda item: render_job_pdf(item[1], item[0], output_dir, render_pool=render_pool), rendered))
+    finally:
+        if render_pool is not None:
+            render_pool.shutdown()
+
+    return {
+        "meta": {
+            "revision": _git_revision(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "pages": args.pages,
+            "formats": args.formats,
+            "jobs": args.jobs,
+            "resume_chars": len(combined_resume),
+            "sections": len(sections),
+            "model": args.model,
+            "concurrency": args.concurrency,
+            "render_workers": args.render_workers,
+            "mock": server is not None,
+            "latency": args.latency,
+            "jitter": args.jitter,
+            "error_rate": args.error_rate,
+            "stream": args.stream,
+            "prompt_layout": args.prompt_layout,
+            "retriever": args.retriever,
+            "chunk_delay": args.chunk_delay,
+        },
+        "stages": timer.stages,
+        "total_seconds": round(sum(s["seconds"] for s in timer.stages.values()), 4),
+        "prompt_cache": prompt_cache_stats(),
+        "failed_jobs": len(errors),
+        "errors": dict(sorted(errors.items())[:20]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every stage of the resume pipeline on a synthetic corpus.")
+    parser.add_argument("--pages", type=int, default=2, help="Approximate pages per synthetic resume (default: 2)")
+    parser.add_argument("--formats", nargs="+", choices=["md", "pdf", "docx"], default=["md"], help="Resume formats (default: md)")
+    parser.add_argument("--jobs", type=int, default=10, help="Number of synthetic job postings (default: 10)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the corpus and mock server (default: 0)")
+    parser.add_argument("--work-dir", type=str, help="Where to write the corpus and PDFs (default: a new temp directory)")
+    parser.add_argument("--model", type=str, default="gpt-4o", help="Model name sent to the API and used for token counts")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent LLM requests (default: 4)")
+    parser.add_argument("--render-workers", type=int, default=0, help="Render in this many worker processes (default: 0, in-process)")
+    parser.add_argument("--embed-batch-size", type=int, default=64, help="Job postings embedded per call (default: 64)")
+    parser.add_argument("--base-url", type=str, help="Benchmark a real OpenAI-compatible endpoint instead of the mock server")
+    parser.add_argument("--latency", type=float, default=0.2, help="Mock server response delay in seconds (default: 0.2)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Mock server extra random delay (default: 0)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Mock server 429/500 rate (default: 0)")
+    parser.add_argument("--chunk-delay", type=float, default=0.0, help="Mock server delay between streamed chunks (default: 0)")
+    parser.add_argument("--stream", action="store_true", help="Stream completions and stop at </resume>")
+    parser.add_argument("--prompt-layout", choices=PROMPT_LAYOUTS, default="classic", help="Prompt layout (default: classic)")
+    parser.add_argument("--retriever", choices=RETRIEVERS, default="embedding", help="Section ranking backend (default: embedding)")
+    parser.add_argument("--backoff-base", type=float, default=0.05, help="Retry backoff base in seconds (default: 0.05)")
+    parser.add_argument("--out", type=str, default="bench_pipeline.json", help="JSON results file (default: bench_pipeline.json)")
+    parser.add_argument("--verbose", action="store_true", help="Show the pipeline's own output while timing")
+    args = parser.parse_args()
+    results = run(args)
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"Total {results['total_seconds']:.3f} s, {results['failed_jobs']} failed jobs; wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
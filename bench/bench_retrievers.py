@@ -0,0 +1,160 @@
+# bench/bench_retrievers.py
+"""
+Compare the embedding and lexical (BM25) retrievers on the same synthetic corpus.
+
+Run from the repository root:
+
+    python -m bench.bench_retrievers --pages 20 --jobs 10000 --out bench_retrievers.json
+
+Each backend runs in a fresh interpreter so its startup time and peak RSS are measured
+alone (loading torch and the model dominates the embedding backend). Ranking quality is
+reported two ways, since the synthetic corpus has no human labels:
+
+- ndcg: nDCG@k of each backend's top-k sections, where a section's relevance is the number
+  of the job's listed skills it mentions. The labels are lexical, so they favour BM25.
+- agreement: overlap@k of the lexical top-k with the embedding top-k, and the Spearman
+  correlation of the two backends' triage orderings of the jobs.
+"""
+import argparse
+import json
+import os
+import re
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from bench.synth import SKILLS, synthetic_job, synthetic_resume
+
+
+def _max_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 / 1024 if sys.platform == "darwin" else rss / 1024
+
+
+def _corpus(pages: int, jobs: int, seed: int):
+    return synthetic_resume(pages, seed), [synthetic_job(i, seed) for i in range(jobs)]
+
+
+def run_backend(backend: str, pages: int, jobs: int, seed: int, top_k: int, batch_size: int) -> dict:
+    """Time one backend end to end in this process; returns timings, RSS and its rankings."""
+    resume, job_texts = _corpus(pages, jobs, seed)
+    baseline_rss = _max_rss_mb()
+    timings = {}
+    start = time.perf_counter()
+    from utils.rag import build_resume_index, configure_retriever, score_jobs, top_k_indices
+    from utils.triage import triage_jobs
+    configure_retriever(backend)
+    timings["import"] = time.perf_counter() - start
+    start = time.perf_counter()
+    index = build_resume_index(resume)
+    timings["index"] = time.perf_counter() - start
+    start = time.perf_counter()
+    scores = score_jobs(index, job_texts, batch_size)
+    timings["score_jobs"] = time.perf_counter() - start
+    top = top_k_indices(scores, top_k)
+    start = time.perf_counter()
+    ranking = triage_jobs(index, [(str(i), text) for i, text in enumerate(job_texts)], batch_size)
+    timings["triage"] = time.perf_counter() - start
+    return {
+        "backend": backend,
+        "seconds": {name: round(value, 4) for name, value in timings.items()},
+        "jobs_per_second": round(jobs / timings["score_jobs"], 1) if timings["score_jobs"] else None,
+        "peak_rss_mb": round(_max_rss_mb(), 1),
+        "rss_added_mb": round(_max_rss_mb() - baseline_rss, 1),
+        "sections": index.sections,
+        "top": top.tolist(),
+        "triage_order": [int(row["job"]) for row in ranking],
+    }
+
+
+def _job_skills(job: str) -> set:
+    return {skill for skill in SKILLS if re.search(rf"(?<![\w+#]){re.escape(skill)}(?![\w+#])", job)}
+
+
+def _ndcg(top: list, sections: list, job_texts: list, k: int) -> float:
+    section_skills = [_job_skills(section) for section in sections]
+    total = 0.0
+    for row, job in zip(top, job_texts):
+        wanted = _job_skills(job)
+        gains = [len(wanted & skills) for skills in section_skills]
+        ideal = sorted(gains, reverse=True)[:k]
+        discounts = [1 / np.log2(rank + 2) for rank in range(k)]
+        idcg = sum(g * d for g, d in zip(ideal, discounts))
+        dcg = sum(gains[i] * d for i, d in zip(row[:k], discounts))
+        total += dcg / idcg if idcg else 1.0
+    return round(total / len(top), 4) if top else None
+
+
+def _spearman(a: list, b: list) -> float:
+    rank_a = np.empty(len(a))
+    rank_a[a] = np.arange(len(a))
+    rank_b = np.empty(len(b))
+    rank_b[b] = np.arange(len(b))
+    return round(float(np.corrcoef(rank_a, rank_b)[0, 1]), 4) if len(a) > 1 else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the embedding and lexical retrievers on a synthetic corpus.")
+    parser.add_argument("--pages", type=int, default=5, help="Approximate pages in the synthetic resume (default: 5)")
+    parser.add_argument("--jobs", type=int, default=1000, help="Number of synthetic job postings (default: 1000)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the corpus (default: 0)")
+    parser.add_argument("--top-k", type=int, default=3, help="Sections compared per job (default: 3)")
+    parser.add_argument("--embed-batch-size", type=int, default=64, help="Job postings encoded per call (default: 64)")
+    parser.add_argument("--backends", nargs="+", choices=["embedding", "lexical"], default=["embedding", "lexical"],
+                        help="Backends to run (default: both)")
+    parser.add_argument("--out", type=str, default="bench_retrievers.json", help="JSON results file (default: bench_retrievers.json)")
+    parser.add_argument("--child", type=str, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        result = run_backend(args.child, args.pages, args.jobs, args.seed, args.top_k, args.embed_batch_size)
+        json.dump(result, sys.stdout)
+        return
+
+    runs = {}
+    for backend in args.backends:
+        cmd = [sys.executable, "-m", "bench.bench_retrievers", "--child", backend, "--pages", str(args.pages),
+               "--jobs", str(args.jobs), "--seed", str(args.seed), "--top-k", str(args.top_k),
+               "--embed-batch-size", str(args.embed_batch_size)]
+        proc = subprocess.run(cmd, capture_output=True, text=True, cwd=os.getcwd())
+        if proc.returncode != 0:
+            print(f"{backend} run failed:\n{proc.stderr}", file=sys.stderr)
+            continue
+        runs[backend] = json.loads(proc.stdout)
+        r = runs[backend]
+        print(f"{backend:<10} import {r['seconds']['import']:>7.2f} s  index {r['seconds']['index']:>7.3f} s  "
+              f"score {r['seconds']['score_jobs']:>7.3f} s ({r['jobs_per_second']} jobs/s)  "
+              f"peak RSS {r['peak_rss_mb']:.0f} MB", file=sys.stderr)
+
+    _, job_texts = _corpus(args.pages, args.jobs, args.seed)
+    results = {"meta": {"pages": args.pages, "jobs": args.jobs, "seed": args.seed, "top_k": args.top_k}, "backends": {}}
+    for backend, r in runs.items():
+        results["backends"][backend] = {
+            "seconds": r["seconds"],
+            "jobs_per_second": r["jobs_per_second"],
+            "peak_rss_mb": r["peak_rss_mb"],
+            "rss_added_mb": r["rss_added_mb"],
+            "ndcg": _ndcg(r["top"], r["sections"], job_texts, args.top_k),
+        }
+    if "embedding" in runs and "lexical" in runs:
+        dense, sparse = runs["embedding"], runs["lexical"]
+        overlap = [len(set(a) & set(b)) / max(len(a), 1) for a, b in zip(dense["top"], sparse["top"])]
+        results["agreement"] = {
+            "overlap_at_k": round(float(np.mean(overlap)), 4) if overlap else None,
+            "triage_spearman": _spearman(dense["triage_order"], sparse["triage_order"]),
+        }
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    for backend, r in results["backends"].items():
+        print(f"{backend:<10} nDCG@{args.top_k} {r['ndcg']}")
+    if "agreement" in results:
+        print(f"Agreement: overlap@{args.top_k} {results['agreement']['overlap_at_k']}, "
+              f"triage Spearman {results['agreement']['triage_spearman']}")
+    print(f"Wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# bench/mock_batch.py
+"""
+Local stand-in for the OpenAI Batch API: turns a --batch-export file into an output file.
+
+Run from the repository root:
+
+    python main.py --batch-export batch_requests.jsonl
+    python -m bench.mock_batch batch_requests.jsonl batch_results.jsonl --error-rate 0.05
+    python main.py --batch-import batch_results.jsonl
+
+Output lines follow the Batch API format (custom_id, response.status_code, response.body),
+in shuffled order like real batch output, with the same fake completions as bench/mock_openai.py.
+"""
+import argparse
+import json
+import random
+
+from bench.mock_openai import _fake_resume
+
+
+def run_batch(requests_path: str, results_path: str, error_rate: float = 0.0, seed: int = None) -> int:
+    rng = random.Random(seed)
+    with open(requests_path, 'r', encoding='utf-8') as f:
+        requests = [json.loads(line) for line in f if line.strip()]
+    rng.shuffle(requests)
+    with open(results_path, 'w', encoding='utf-8') as f:
+        for n, request in enumerate(requests):
+            body = request["body"]
+            if rng.random() < error_rate:
+                response = {"status_code": 500, "request_id": f"req_mock_{n}",
+                            "body": {"error": {"message": "Internal server error (mock)"}}}
+            else:
+                content = _fake_resume(body["messages"][-1]["content"])
+                response = {"status_code": 200, "request_id": f"req_mock_{n}", "body": {
+                    "id": f"chatcmpl-mock-{n}",
+                    "object": "chat.completion",
+                    "model": body.get("model", "mock"),
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                }}
+            line = {"id": f"batch_req_mock_{n}", "custom_id": request["custom_id"], "response": response, "error": None}
+            f.write(json.dumps(line, ensure_ascii=False) + '\n')
+    return len(requests)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Answer a Batch API input file locally with fake completions.")
+    parser.add_argument("requests", help="Batch input file written by --batch-export")
+    parser.add_argument("results", help="Where to write the batch output file")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 500 (default: 0)")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for ordering and failures")
+    args = parser.parse_args()
+    count = run_batch(args.requests, args.results, args.error_rate, args.seed)
+    print(f"Wrote {count} results to {args.results}")
+
+
+if __name__ == "__main__":
+    main()
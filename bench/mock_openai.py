@@ -0,0 +1,200 @@
+# bench/mock_openai.py
+"""
+Local stand-in for the OpenAI chat completions API, for benchmarks and offline runs.
+
+Run from the repository root:
+
+    python -m bench.mock_openai --port 8765 --latency 0.5 --jitter 0.2 --error-rate 0.05
+
+then point the generator at it with OPENAI_BASE_URL=http://127.0.0.1:8765/v1 (any API key
+is accepted). Responses are a small <resume> built from the prompt; failures are 429s
+(with Retry-After) and 500s in equal measure. Requests with "stream": true get server-sent
+events, one small chunk every --chunk-delay seconds, with commentary after </resume> like
+real models tend to add. Like OpenAI's prompt caching, prompts sharing a prefix of 1024+
+tokens with an earlier request report it in usage.prompt_tokens_details.cached_tokens and
+are answered faster (up to half the latency when the whole prompt is cached).
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _fake_resume(prompt: str) -> str:
+    # Echo a few prompt lines so responses differ per job, like real completions
+    lines = [line.strip("-• ") for line in prompt.split('\n') if line.strip()][:6]
+    items = ''.join(f"<li>{line[:120]}</li>" for line in lines)
+    return f"```html\n<resume><h1>Jane Doe</h1><h2>Experience</h2><ul>{items}</ul></resume>\n```"
+
+
+# Trailing text streamed after the resume; a client that stops at </resume> never waits for it
+_COMMENTARY = "\n\nI tailored the summary and reordered the experience section to match the job's requirements. " * 4
+_CHUNK_CHARS = 16
+# Prefix caching granularity, at roughly four characters per token: 1024 tokens, then steps of 128
+_CACHE_MIN_CHARS = 4096
+_CACHE_STEP_CHARS = 512
+
+
+def _usage(request: dict, content: str, cached_chars: int) -> dict:
+    prompt_tokens = sum(len(m.get("content", "")) for m in request["messages"]) // 4
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": len(content) // 4,
+            "total_tokens": prompt_tokens + len(content) // 4,
+            "prompt_tokens_details": {"cached_tokens": cached_chars // 4}}
+
+
+class MockOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload: dict, headers: dict = None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_stream(self, request: dict, content: str, cached_chars: int):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        base = {"id": f"chatcmpl-mock-{self.server.requests}", "object": "chat.completion.chunk",
+                "model": request.get("model", "mock")}
+        try:
+            for i in range(0, len(content), _CHUNK_CHARS):
+                if self.server.chunk_delay:
+                    time.sleep(self.server.chunk_delay)
+                chunk = {**base, "choices": [{"index": 0, "delta": {"content": content[i:i + _CHUNK_CHARS]}, "finish_reason": None}]}
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+                self.wfile.flush()
+            if (request.get("stream_options") or {}).get("include_usage"):
+                usage = _usage(request, content, cached_chars)
+                self.wfile.write(f"data: {json.dumps({**base, 'choices': [], 'usage': usage})}\n\n".encode('utf-8'))
+            self.wfile.write(b"data: [DONE]\n\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # The client stopped reading after </resume>
+            pass
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if not self.path.rstrip('/').endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+        server = self.server
+        try:
+            request = json.loads(body)
+            prompt = request["messages"][-1]["content"]
+        except (ValueError, KeyError, IndexError, TypeError):
+            self._send_json(400, {"error": {"message": "Malformed chat completions request"}})
+            return
+        prompt_text = ''.join(m.get("content", "") for m in request["messages"])
+        with server.lock:
+            server.requests += 1
+            cached_chars = server.cached_prefix(prompt_text)
+            delay = (server.latency + server.rng.uniform(0, server.jitter)) * (1 - 0.5 * cached_chars / max(len(prompt_text), 1))
+            fail = server.rng.random() < server.error_rate
+            status = server.rng.choice([429, 500]) if fail else 200
+        time.sleep(delay)
+        if status == 429:
+            self._send_json(429, {"error": {"message": "Rate limit reached (mock)"}}, {"Retry-After": "0"})
+            return
+        if status == 500:
+            self._send_json(500, {"error": {"message": "Internal server error (mock)"}})
+            return
+        content = _fake_resume(prompt) + _COMMENTARY
+        if request.get("stream"):
+            self._send_stream(request, content, cached_chars)
+            return
+        # A non-streamed response arrives only once the whole completion is generated
+        time.sleep(server.chunk_delay * -(-len(content) // _CHUNK_CHARS))
+        self._send_json(200, {
+            "id": f"chatcmpl-mock-{server.requests}",
+            "object": "chat.completion",
+            "model": request.get("model", "mock"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": _usage(request, content, cached_chars),
+        })
+
+
+class MockOpenAIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.2, jitter: float = 0.0,
+                 error_rate: float = 0.0, seed: int = None, chunk_delay: float = 0.0):
+        """
+        Args:
+            host, port: Address to listen on; port 0 picks a free port
+            latency: Seconds every response is delayed by
+            jitter: Extra uniformly random delay of up to this many seconds
+            error_rate: Fraction of requests answered with a 429 or 500
+            seed: Random seed for reproducible delays and failures
+            chunk_delay: Seconds between streamed chunks
+        """
+        super().__init__((host, port), MockOpenAIHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.chunk_delay = chunk_delay
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.prefixes = set()
+
+    def cached_prefix(self, text: str) -> int:
+        """Length of the longest cacheable prefix of ``text`` seen before; remembers this prompt's prefixes.
+
+        Call with ``lock`` held.
+        """
+        cached = 0
+        for end in range(_CACHE_MIN_CHARS, len(text) + 1, _CACHE_STEP_CHARS):
+            key = hash(text[:end])
+            if key in self.prefixes:
+                cached = end
+            else:
+                self.prefixes.add(key)
+        return cached
+
+    @property
+    def base_url(self) -> str:
+        """Value for OPENAI_BASE_URL."""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+
+def start_mock_server(**kwargs) -> MockOpenAIServer:
+    """Start a MockOpenAIServer on a daemon thread; call .shutdown() to stop it."""
+    server = MockOpenAIServer(**kwargs)
+    threading.Thread(target=server.serve_forever, name="mock-openai", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a mock OpenAI /v1/chat/completions endpoint.")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Listen address (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="Listen port (default: 8765)")
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds added to every response (default: 0.2)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random delay of up to this many seconds (default: 0)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests failing with 429/500 (default: 0)")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for delays and failures")
+    parser.add_argument("--chunk-delay", type=float, default=0.01, help="Seconds between streamed chunks (default: 0.01)")
+    args = parser.parse_args()
+    server = MockOpenAIServer(args.host, args.port, args.latency, args.jitter, args.error_rate, args.seed, args.chunk_delay)
+    print(f"Mock OpenAI server listening; set OPENAI_BASE_URL={server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+# bench/synth.py
+"""
+Synthetic resumes and job postings for benchmarks.
+
+Run from the repository root:
+
+    python -m bench.synth --out bench_data --pages 120 --formats md pdf docx --jobs 1000
+
+Writes resumes to <out>/in and job postings to <out>/jobs, laid out like the real inputs.
+Output is deterministic for a given --seed.
+"""
+import argparse
+import os
+import random
+
+SKILLS = ["Python", "Go", "Rust", "TypeScript", "Kubernetes", "Terraform", "AWS", "GCP", "PostgreSQL", "Kafka",
+          "Spark", "Airflow", "React", "GraphQL", "Docker", "Redis", "Elasticsearch", "PyTorch", "dbt", "Snowflake"]
+ROLES = ["Software Engineer", "Backend Engineer", "Data Engineer", "Platform Engineer", "Machine Learning Engineer",
+         "Site Reliability Engineer", "Full Stack Developer", "Analytics Engineer"]
+COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella Labs", "Hooli", "Stark Industries", "Wayne Analytics",
+             "Cyberdyne Systems", "Soylent Data", "Tyrell Cloud"]
+VERBS = ["Built", "Designed", "Led", "Migrated", "Automated", "Optimized", "Shipped", "Scaled", "Refactored", "Owned"]
+OBJECTS = ["an event ingestion pipeline", "the billing service", "a feature store", "CI/CD for 40 services",
+           "the search backend", "a multi-region deployment", "internal developer tooling", "the reporting warehouse",
+           "a real-time fraud model", "observability dashboards"]
+OUTCOMES = ["cutting p95 latency by {n}%", "saving ${n}k per year", "serving {n}M requests per day",
+            "reducing incidents by {n}%", "onboarding {n} teams", "improving throughput {n}x"]
+
+# Roughly one page of text in the rendered resume
+LINES_PER_PAGE = 50
+
+
+def _bullet(rng: random.Random) -> str:
+    outcome = rng.choice(OUTCOMES).format(n=rng.randint(2, 90))
+    return f"{rng.choice(VERBS)} {rng.choice(OBJECTS)} with {rng.choice(SKILLS)} and {rng.choice(SKILLS)}, {outcome}"
+
+
+def synthetic_resume(pages: int = 2, seed: int = 0) -> str:
+    """Markdown resume of about ``pages`` pages: contact block, summary, skills, then experience entries."""
+    rng = random.Random(seed)
+    lines = [
+        "# Jane Doe",
+        "jane.doe@example.com | (555) 010-0000 | https://github.com/janedoe | https://linkedin.com/in/janedoe",
+        "",
+        "## Summary",
+        f"{rng.choice(ROLES)} with {rng.randint(3, 20)} years of experience in " + ", ".join(rng.sample(SKILLS, 5)) + ".",
+        "",
+        "## Skills",
+        ", ".join(rng.sample(SKILLS, 12)),
+        "",
+        "## Experience",
+    ]
+    year = 2024
+    while len(lines) < pages * LINES_PER_PAGE:
+        lines += ["", f"### {rng.choice(ROLES)}, {rng.choice(COMPANIES)} ({year - 2}-{year})"]
+        lines += [f"- {_bullet(rng)}" for _ in range(rng.randint(4, 8))]
+        year -= 2
+    lines += ["", "## Education", "B.S. Computer Science, State University", "",
+              "## Certifications", "AWS Certified Solutions Architect"]
+    return '\n'.join(lines) + '\n'
+
+
+def synthetic_job(i: int, seed: int = 0) -> str:
+    """One job posting with a title, summary paragraph and requirements list."""
+    rng = random.Random(seed * 1000003 + i)
+    role = rng.choice(ROLES)
+    company = rng.choice(COMPANIES)
+    skills = rng.sample(SKILLS, 6)
+    lines = [
+        f"{role} - {company}",
+        "",
+        f"{company} is hiring a {role} to join a small team that owns {rng.choice(OBJECTS)} and "
+        f"{rng.choice(OBJECTS)}. You will work closely with product and infrastructure teams, "
+        f"ship to production every week and help us grow to {rng.randint(2, 50)}M users.",
+        "",
+        "Requirements:",
+    ]
+    lines += [f"- {rng.randint(2, 8)}+ years of experience with {skill}" for skill in skills[:3]]
+    lines += [f"- Familiarity with {skill}" for skill in skills[3:]]
+    return '\n'.join(lines) + '\n'
+
+
+def write_docx(text: str, path: str):
+    from docx import Document
+    doc = Document()
+    for line in text.split('\n'):
+        doc.add_paragraph(line)
+    doc.save(path)
+
+
+def _pdf_escape(line: str) -> str:
+    return line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def write_pdf(text: str, path: str, lines_per_page: int = LINES_PER_PAGE):
+    """Write ASCII text as a plain multi-page PDF (Helvetica, one text block per page).
+
+    Kept dependency-free so the corpus can be generated without a renderer installed.
+    """
+    lines = text.split('\n')
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+    objects = []  # object bodies, numbered from 1
+    page_ids = []
+    font_id = 3
+    for page in pages:
+        stream = "BT /F1 10 Tf 14 TL 50 790 Td\n" + ''.join(f"({_pdf_escape(line)}) '\n" for line in page) + "ET"
+        objects.append(f"<< /Length {len(stream.encode('latin-1'))} >>\nstream\n{stream}\nendstream")
+        content_id = 3 + len(objects)
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+                       f"/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {content_id} 0 R >>")
+        page_ids.append(content_id + 1)
+    header = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{' '.join(f'{pid} 0 R' for pid in page_ids)}] /Count {len(page_ids)} >>",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(header + objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode('latin-1')
+    xref = len(out)
+    out += f"xref\n0 {len(offsets) + 1}\n0000000000 65535 f \n".encode('ascii')
+    out += ''.join(f"{offset:010d} 00000 n \n" for offset in offsets).encode('ascii')
+    out += f"trailer\n<< /Size {len(offsets) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode('ascii')
+    with open(path, 'wb') as f:
+        f.write(out)
+
+
+def generate_corpus(out_dir: str, pages: int = 2, formats=("md",), jobs: int = 10, seed: int = 0):
+    """Write one resume per format to <out_dir>/in and ``jobs`` postings to <out_dir>/jobs.
+
+    Returns:
+        (input directory, jobs directory)
+    """
+    in_dir = os.path.join(out_dir, "in")
+    jobs_dir = os.path.join(out_dir, "jobs")
+    os.makedirs(in_dir, exist_ok=True)
+    os.makedirs(jobs_dir, exist_ok=True)
+    writers = {"md": None, "pdf": write_pdf, "docx": write_docx}
+    for n, fmt in enumerate(formats):
+        # A different resume per format so the combined resume is not one text repeated
+        text = synthetic_resume(pages, seed + n)
+        path = os.path.join(in_dir, f"resume_{fmt}.{fmt}")
+        if writers[fmt] is None:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+        else:
+            writers[fmt](text, path)
+    width = len(str(jobs))
+    for i in range(jobs):
+        with open(os.path.join(jobs_dir, f"job_{i:0{width}d}.txt"), 'w', encoding='utf-8') as f:
+            f.write(synthetic_job(i, seed))
+    return in_dir, jobs_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic resume/job corpus for benchmarks.")
+    parser.add_argument("--out", type=str, default="bench_data", help="Output directory (default: bench_data)")
+    parser.add_argument("--pages", type=int, default=2, help="Approximate pages per resume (default: 2)")
+    parser.add_argument("--formats", nargs="+", choices=["md", "pdf", "docx"], default=["md"], help="Resume formats to write (default: md)")
+    parser.add_argument("--jobs", type=int, default=10, help="Number of job postings (default: 10)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    args = parser.parse_args()
+    in_dir, jobs_dir = generate_corpus(args.out, args.pages, args.formats, args.jobs, args.seed)
+    print(f"Wrote {len(args.formats)} resumes to {in_dir} and {args.jobs} job postings to {jobs_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,31 @@
 import argparse
 import os
+from dataclasses import dataclass
 import re
+import shutil
+import threading
+import time
 import warnings
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 warnings.filterwarnings("ignore", category=FutureWarning)
 from dotenv import load_dotenv
-from utils.parser import read_file, read_job_files
-from utils.pdf import html_to_pdf
-from utils.llm import call_ai_provider
-from utils.rag import most_relevant_resume_sections
-from utils.pdf_style import inject_resume_css
-from utils.prompt import build_resume_prompt
-from PyPDF2 import PdfReader
-import tiktoken
+from utils.parser import CLEAN_CONTENT_VERSION, read_file, read_job_files
+from utils.pdf import RenderPool, get_resume_stylesheet, render_html_dir, render_resume_file
+from utils.llm import call_ai_provider, configure_openai_client, prompt_cache_stats
+from utils.batch import batch_custom_id, export_batch, read_batch_results
+from utils.cache import ParsedInputCache, ResponseCache
+from utils.rag import (EMBEDDING_BACKENDS, RETRIEVERS, build_resume_index, configure_embedder, configure_retriever,
+                       embed_jobs, embedder_key, most_relevant_resume_sections, rank_sections_batch)
+from utils.pdf_style import inject_resume_css, resume_style_digest
+from utils.prompt import PROMPT_LAYOUTS, PROMPT_VERSION, build_resume_prompt
+from utils.manifest import BuildManifest, hash_text
+from utils.metrics import annotate, close_metrics, configure_metrics, emit, profile_call, span
+from utils.segment import SEGMENTER_VERSION
+from utils.dedup import find_duplicate_groups
+from utils.watch import JobWatcher
+from utils.triage import select_jobs, triage_jobs, write_triage_report
+from utils.tokens import count_tokens, pack_by_budget, trim_to_budget
 import logging
 
 logging.basicConfig(level=logging.WARNING)
@@ -28,15 +42,60 @@ def parse_args():
     parser.add_argument("--openai-key", type=str, help="OpenAI API key (or set OPENAI_API_KEY env var)")
     parser.add_argument("--model", type=str, default="gpt-4o", help="OpenAI model to use (default: gpt-4o)")
     parser.add_argument("--master-resume-url", type=str, help="URL to hosted master resume. If provided, adds a footer with link to master resume.")
+    parser.add_argument("--concurrency", type=int, default=1, help="Number of jobs to run through the LLM and PDF render stages in parallel (default: 1)")
+    parser.add_argument("--connect-timeout", type=float, default=float(os.environ.get("OPENAI_CONNECT_TIMEOUT", 10)), help="Seconds to wait for a connection to the AI provider (default: 10)")
+    parser.add_argument("--read-timeout", type=float, default=float(os.environ.get("OPENAI_READ_TIMEOUT", 120)), help="Seconds to wait for a completion response (default: 120)")
+    parser.add_argument("--max-prompt-tokens", type=int, help="Token budget for each prompt; resume sections are packed by relevance and the cover letter and suggestions trimmed to fit")
+    parser.add_argument("--embed-batch-size", type=int, default=64, help="Job postings embedded per batch when scoring resume sections (default: 64)")
+    parser.add_argument("--embedding-model", type=str, default=os.environ.get("EMBEDDING_MODEL", "all-MiniLM-L6-v2"), help="Sentence-transformers model name or local path used to rank resume sections (default: all-MiniLM-L6-v2)")
+    parser.add_argument("--embedding-backend", choices=EMBEDDING_BACKENDS, default=os.environ.get("EMBEDDING_BACKEND", "torch"),
+                        help="'onnx' runs an int8 ONNX export (see --export-onnx) with onnxruntime; --embedding-model is then its directory (default: torch)")
+    parser.add_argument("--embed-threads", type=int, default=0, help="CPU threads for embedding inference (default: 0, library default)")
+    parser.add_argument("--export-onnx", type=str, metavar="DIR", help="Export --embedding-model to DIR as an int8-quantized ONNX model, then exit")
+    parser.add_argument("--retriever", choices=RETRIEVERS, default=os.environ.get("RESUME_RETRIEVER", "embedding"),
+                        help="How resume sections are ranked: 'embedding' (sentence-transformers) or 'lexical' (BM25, no torch) (default: embedding)")
+    parser.add_argument("--cache-dir", type=str, default=".cache", help="Directory for cached LLM responses (default: .cache)")
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write the LLM response cache")
+    parser.add_argument("--refresh", action="store_true", help="Ignore cached LLM responses but store the new ones")
+    parser.add_argument("--cache-max-mb", type=float, default=500, help="Trim the LLM response cache to this size after each run (default: 500)")
+    parser.add_argument("--cache-max-age-days", type=float, default=30, help="Treat cached LLM responses older than this as stale (default: 30)")
+    parser.add_argument("--max-retries", type=int, default=int(os.environ.get("OPENAI_MAX_RETRIES", 4)), help="Retries for rate limits, 5xx responses and connection errors (default: 4)")
+    parser.add_argument("--force", action="store_true", help="Regenerate every resume even if its inputs are unchanged since the last run")
+    parser.add_argument("--render-workers", type=int, default=0, help="Render PDFs in this many worker processes (default: 0, render in-process)")
+    parser.add_argument("--max-tasks-per-child", type=int, default=50, help="Restart a render worker after this many PDFs to bound memory use (default: 50)")
+    parser.add_argument("--render-html", type=str, metavar="DIR", help="Only render every .html file in DIR to PDF in --output, then exit")
+    parser.add_argument("--prompt-layout", choices=PROMPT_LAYOUTS, default="classic",
+                        help="'cache' puts instructions and candidate context before the job so provider prompt caching applies (default: classic)")
+    parser.add_argument("--candidates", action="store_true", help="Treat each subdirectory of --input as a candidate and generate every candidate against every job into <output>/<candidate>")
+    parser.add_argument("--triage", type=str, metavar="FILE", help="Rank every job by fit to the resume and write the ranking to FILE (.csv or .json); exits unless --top or --min-score is given")
+    parser.add_argument("--top", type=int, metavar="N", help="Only generate resumes for the N best-matching jobs")
+    parser.add_argument("--min-score", type=float, help="Only generate resumes for jobs whose fit score is at least this; the scale depends on --retriever (about 0.2-0.7 for embedding, 0.1-0.4 for lexical)")
+    parser.add_argument("--serve", type=str, nargs="?", const="127.0.0.1:8080", metavar="ADDR",
+                        help="Run as a server on host:port or a Unix socket path (default: 127.0.0.1:8080), keeping the models and renderer loaded; see README")
+    parser.add_argument("--queue-size", type=int, default=16, help="Requests the server queues before answering 429 (default: 16)")
+    parser.add_argument("--request-timeout", type=float, default=300, help="Seconds a server request may wait for its resume (default: 300)")
+    parser.add_argument("--watch", action="store_true", help="After the run, keep watching --jobs and generate resumes for new or modified job files as they appear")
+    parser.add_argument("--watch-debounce", type=float, default=2.0, help="Seconds a job file must stay unchanged before --watch reads it (default: 2)")
+    parser.add_argument("--watch-poll", type=float, default=2.0, help="Polling interval in seconds when inotify is unavailable (default: 2)")
+    parser.add_argument("--no-dedup", action="store_true", help="Generate every job separately, even near-identical reposts")
+    parser.add_argument("--dedup-threshold", type=float, default=0.85, help="Word-shingle Jaccard similarity at which two postings count as duplicates (default: 0.85)")
+    parser.add_argument("--stream", action="store_true", help="Stream completions, stop reading at </resume> and record time to first token")
+    parser.add_argument("--batch-export", type=str, metavar="FILE", help="Write one OpenAI Batch API request per job to FILE instead of calling the API")
+    parser.add_argument("--batch-import", type=str, metavar="FILE", help="Render resumes from an OpenAI Batch API output FILE instead of calling the API")
+    parser.add_argument("--metrics-out", type=str, metavar="FILE", help="Append per-stage timing spans (durations, tokens, bytes, cache hits) to FILE as JSON lines")
+    parser.add_argument("--profile", nargs="?", const="", metavar="FILE", help="Run under cProfile and tracemalloc and print the hottest functions; optionally save pstats data to FILE")
+    parser.add_argument("--log-level", type=str.upper, default=os.environ.get("LOG_LEVEL", "WARNING"),
+                        choices=["DEBUG", "INFO", "WARNING", "ERROR"], help="Logging verbosity; INFO shows token counts, DEBUG the retrieved RAG context (default: WARNING)")
+    parser.add_argument("--import-time", action="store_true", help="Report where startup and dependency import time goes, then exit")
     return parser.parse_args()
 
 
 def extract_pdf_text(pdf_path: str) -> str:
     from utils.parser import clean_content
+    from PyPDF2 import PdfReader
     reader = PdfReader(pdf_path)
-    text = ""
-    for page in reader.pages:
-        text += page.extract_text() or ""
+    # Collect pages and join once; repeated += is quadratic on long documents
+    text = "".join(page.extract_text() or "" for page in reader.pages)
     return clean_content(text)
 
 
@@ -44,8 +103,8 @@ def extract_docx_text(docx_path: str) -> str:
     try:
         from docx import Document
     except ImportError:
-        logging.error("python-docx is not installed. Cannot parse docx files.")
-        return ""
+        # Raise rather than return "" so the parsed input cache never stores the missing text
+        raise RuntimeError("python-docx is not installed. Cannot parse docx files.")
     doc = Document(docx_path)
     # Extract paragraphs and combine with single newline
     return '\n'.join(para.text.strip() for para in doc.paragraphs if para.text.strip())
@@ -62,92 +121,125 @@ def get_resume_content(path: str) -> str:
     return read_file(path)
 
 
-def get_all_resumes(in_dir: str) -> list:
+def get_all_resumes(in_dir: str, input_cache=None) -> list:
+    """Read every resume file in ``in_dir`` in name order.
+
+    PDF and DOCX text goes through ``input_cache`` (a ParsedInputCache) when given, so
+    unchanged documents are parsed only once across runs.
+    """
+    extractors = {".pdf": extract_pdf_text, ".docx": extract_docx_text}
     resumes = []
     try:
-        for fname in os.listdir(in_dir):
+        for fname in sorted(os.listdir(in_dir)):
             ext = os.path.splitext(fname)[1].lower()
             path = os.path.join(in_dir, fname)
             # Ignore files with no extension
             if not ext:
                 continue
-            if ext in [".pdf", ".md", ".txt", ".docx"]:
-                if ext == ".pdf":
-                    try:
-                        print(f"Extracting text from PDF: {path}")
-                        text = extract_pdf_text(path)
-                        if text and text.strip():
-                            resumes.append((fname, text))
-                    except Exception as e:
-                        logging.error(f"Error extracting text from PDF {fname}: {e}")
-                elif ext == ".docx":
-                    try:
-                        print(f"Extracting text from DOCX: {path}")
-                        text = extract_docx_text(path)
-                        if text and text.strip():
-                            resumes.append((fname, text))
-                    except Exception as e:
-                        logging.error(f"Error extracting text from DOCX {fname}: {e}")
-                else:
-                    text = read_file(path)
+            if ext in extractors:
+                try:
+                    start = time.perf_counter()
+                    with span("parse", file=fname, format=ext[1:], bytes=os.path.getsize(path)) as record:
+                        if input_cache is not None:
+                            text, cached = input_cache.get_or_extract(path, extractors[ext])
+                        else:
+                            text, cached = extractors[ext](path), False
+                        record.update(cached=cached, chars=len(text))
+                    elapsed = time.perf_counter() - start
+                    source = "cache" if cached else ext[1:].upper()
+                    print(f"Extracted text from {source}: {path} ({len(text)} chars in {elapsed:.2f}s)")
                     if text and text.strip():
                         resumes.append((fname, text))
+                except Exception as e:
+                    logging.error(f"Error extracting text from {ext[1:].upper()} {fname}: {e}")
+            elif ext in [".md", ".txt"]:
+                with span("parse", file=fname, format=ext[1:], bytes=os.path.getsize(path)) as record:
+                    text = read_file(path)
+                    record["chars"] = len(text)
+                if text and text.strip():
+                    resumes.append((fname, text))
     except Exception as e:
         logging.error(f"Error reading resumes from {in_dir}: {e}")
     return resumes
 
 
-def count_tokens(text: str, model: str = "gpt-4o") -> int:
-    enc = tiktoken.encoding_for_model(model)
-    return len(enc.encode(text))
-
-
-def generate_resume_content(base_resume: str, job: str, provider: str, api_key: str, model: str, coverletter: str = "", suggestions: str = "") -> str:
-    # Use most_relevant_resume_sections to get relevant sections for the resume
-    relevant_sections = most_relevant_resume_sections(base_resume, job)
-    # Clean up sections to ensure proper formatting
-    def clean_section(section):
-        # First clean inline spacing
-        section = re.sub(r'\s+', ' ', section.strip())
-        # Fix overspaced URLs and links
-        section = re.sub(r'(?:https?:\/\/|www\.)\s+([^\s]+(?:\s+[^\s]+)*)', lambda m: 'https://' + ''.join(m.group(1).split()), section)
-        # Fix broken email addresses
-        section = re.sub(r'([a-zA-Z0-9._%+-]+)\s*@\s*([a-zA-Z0-9.-]+\s*\.\s*[a-zA-Z]{2,})', lambda m: f"{m.group(1)}@{''.join(m.group(2).split())}", section)
-        return section
-
-    # Clean sections while preserving structure
-    def clean_section_content(section):
-        # Clean URLs and emails first
-        section = re.sub(r'(?:https?:\/\/|www\.)\s+([^\s]+(?:\s+[^\s]+)*)', lambda m: 'https://' + ''.join(m.group(1).split()), section)
-        section = re.sub(r'([a-zA-Z0-9._%+-]+)\s*@\s*([a-zA-Z0-9.-]+\s*\.\s*[a-zA-Z]{2,})', lambda m: f"{m.group(1)}@{''.join(m.group(2).split())}", section)
-        
-        # Preserve bullet points and structure
-        lines = []
-        for line in section.split('\n'):
-            # Clean extra spaces but keep indentation
-            line = re.sub(r'[ \t]+', ' ', line.rstrip())
-            # Standardize bullet points
-            line = re.sub(r'^\s*[•\-*]\s+', '• ', line)
-            if line.strip():
-                lines.append(line)
-        
-        # Join with proper spacing
-        return '\n'.join(lines)
-
-    # Process relevant sections
-    processed_sections = []
-    for section in relevant_sections:
-        if section.strip():
-            # Split into header and content if possible
-            parts = section.split('\n', 1)
-            if len(parts) > 1:
-                header, content = parts[0].strip(), parts[1].strip()
-                if header and content:
-                    processed_sections.append(f"{header}\n{clean_section_content(content)}")
-            else:
-                processed_sections.append(clean_section_content(section))
-    
-    relevant_sections = processed_sections
+def _log_section_breakdown(sections: list, counts: list, kept: list):
+    breakdown = ["Section token breakdown:"]
+    for section, tokens, was_kept in zip(sections, counts, kept):
+        title = section.split('\n', 1)[0][:50]
+        breakdown.append(f"  {tokens:>6} {'kept   ' if was_kept else 'dropped'} {title}")
+    logging.debug('\n'.join(breakdown))
+
+
+def fit_prompt_budget(keywords: str, relevant_sections: list, job_summary: str, coverletter: str, suggestions: str,
+                      model: str, max_prompt_tokens: int, layout: str = "classic"):
+    """Shrink prompt context to fit ``max_prompt_tokens``.
+
+    The fixed part of the prompt (instructions, keywords, job summary) is measured first.
+    Relevance-ranked sections are packed greedily into what is left, then whole paragraphs
+    of the cover letter and suggestions.
+
+    With the "cache" layout the cover letter and suggestions belong to the prefix every job
+    shares. They are trimmed only to fit beside the instructions, the same way for every
+    job, and each job's budget comes out of its sections; only a job that still does not
+    fit loses shared context (and with it the cached prefix).
+
+    Returns:
+        The packed sections, cover letter and suggestions
+    """
+    if layout == "cache":
+        shared_budget = max_prompt_tokens - count_tokens(build_resume_prompt("", [], "", layout=layout), model)
+        coverletter = trim_to_budget(coverletter, shared_budget, model)
+        shared_budget -= count_tokens(coverletter, model) if coverletter else 0
+        suggestions = trim_to_budget(suggestions, shared_budget, model)
+        fixed_context = (coverletter, suggestions)
+    else:
+        fixed_context = ("", "")
+    base_tokens = count_tokens(build_resume_prompt(keywords, [], job_summary, *fixed_context, layout), model)
+    remaining = max_prompt_tokens - base_tokens
+    if remaining <= 0 and layout != "cache":
+        logging.warning(f"Prompt instructions alone use {base_tokens} tokens, over the {max_prompt_tokens} token budget")
+        return [], "", ""
+    packed, counts, kept = pack_by_budget(relevant_sections, max(remaining, 0), model)
+    remaining -= sum(c for c, k in zip(counts, kept) if k)
+    breakdown = ["Section token breakdown:"]
+    for section, tokens, was_kept in zip(relevant_sections, counts, kept):
+        title = section.split('\n', 1)[0][:50]
+        breakdown.append(f"  {tokens:>6} {'kept   ' if was_kept else 'dropped'} {title}")
+    logging.debug('\n'.join(breakdown))
+    if layout != "cache":
+        coverletter = trim_to_budget(coverletter, remaining, model)
+        remaining -= count_tokens(coverletter, model) if coverletter else 0
+        suggestions = trim_to_budget(suggestions, remaining, model)
+    # The cover letter/suggestion instructions add a little text of their own; drop the
+    # lowest-ranked context until the full prompt fits. The cache layout gives up its
+    # sections before the shared cover letter and suggestions.
+    while count_tokens(build_resume_prompt(keywords, packed, job_summary, coverletter, suggestions, layout), model) > max_prompt_tokens:
+        if packed and layout == "cache":
+            packed = packed[:-1]
+        elif suggestions:
+            suggestions = ""
+        elif coverletter:
+            coverletter = ""
+        elif packed:
+            packed = packed[:-1]
+        else:
+            logging.warning(f"Prompt instructions alone are over the {max_prompt_tokens} token budget")
+            break
+    logging.info(f"Context tokens: sections {sum(count_tokens(s, model) for s in packed)}, "
+                 f"cover letter {count_tokens(coverletter, model) if coverletter else 0}, "
+                 f"suggestions {count_tokens(suggestions, model) if suggestions else 0}")
+    return packed, coverletter, suggestions
+
+
+def build_job_prompt(base_resume: str, job: str, model: str, coverletter: str = "", suggestions: str = "", index=None,
+                     relevant_sections: list = None, max_prompt_tokens: int = None, layout: str = "classic") -> str:
+    # Use most_relevant_resume_sections to get relevant sections for the resume, unless the
+    # batch scorer already picked them
+    if relevant_sections is None:
+        relevant_sections = most_relevant_resume_sections(base_resume, job, index=index)
+    # Sections come out of the segmenter already normalized with • bullets
+    relevant_sections = [section for section in relevant_sections if section.strip()]
     
     # Extract keywords and clean job description
     # First, try to find a "Requirements" or "Qualifications" section
@@ -176,16 +268,24 @@ def generate_resume_content(base_resume: str, job: str, provider: str, api_key:
             break
     else:
         job_summary = job_title  # Fallback to title if no good paragraph found
-    # Debug: Print extracted context for troubleshooting
-    print("--- RAG Context ---")
-    print(f"Keywords: {keywords}")
-    print(f"Relevant Sections: {relevant_sections}")
-    print(f"Job Summary: {job_summary}")
-    print("-------------------")
-    prompt = build_resume_prompt(keywords, relevant_sections, job_summary, coverletter, suggestions)
+    # Extracted context for troubleshooting, shown with --log-level DEBUG
+    logging.debug(f"RAG context:\nKeywords: {keywords}\nRelevant Sections: {relevant_sections}\nJob Summary: {job_summary}")
+    if max_prompt_tokens:
+        relevant_sections, coverletter, suggestions = fit_prompt_budget(
+            keywords, relevant_sections, job_summary, coverletter, suggestions, model, max_prompt_tokens, layout)
+    if layout == "cache" and index is not None:
+        # Resume order instead of relevance order, so jobs that pick the same sections share
+        # the prompt prefix up to the first section where they differ
+        position = {section: i for i, section in enumerate(index.sections)}
+        relevant_sections = sorted(relevant_sections, key=lambda section: position.get(section, len(position)))
+    prompt = build_resume_prompt(keywords, relevant_sections, job_summary, coverletter, suggestions, layout)
     prompt_tokens = count_tokens(prompt, model)
-    print(f"Prompt tokens: {prompt_tokens}")
-    response = call_ai_provider(prompt, provider, api_key, model)
+    logging.info(f"Prompt tokens: {prompt_tokens}")
+    annotate(prompt_tokens=prompt_tokens, sections=len(relevant_sections), chars=len(prompt))
+    return prompt
+
+
+def extract_resume_html(response: str, model: str = "gpt-4o") -> str:
     # Remove ```html and ``` if present
     response = re.sub(r'^```html\s*', '', response.strip(), flags=re.IGNORECASE)
     response = re.sub(r'```$', '', response.strip(), flags=re.IGNORECASE)
@@ -193,23 +293,412 @@ def generate_resume_content(base_resume: str, job: str, provider: str, api_key:
     match = re.search(r'<resume>(.*?)</resume>', response, re.DOTALL | re.IGNORECASE)
     output_html = match.group(1).strip() if match else response.strip()
     output_tokens = count_tokens(output_html, model)
-    print(f"Output tokens: {output_tokens}")
+    logging.info(f"Output tokens: {output_tokens}")
+    annotate(output_tokens=output_tokens)
     return output_html
 
 
+def generate_resume_content(base_resume: str, job: str, provider: str, api_key: str, model: str, coverletter: str = "", suggestions: str = "", cache=None, index=None,
+                            max_prompt_tokens: int = None, prompt_layout: str = "classic", stream: bool = False) -> str:
+    prompt = build_job_prompt(base_resume, job, model, coverletter, suggestions, index,
+                              max_prompt_tokens=max_prompt_tokens, layout=prompt_layout)
+    response = call_ai_provider(prompt, provider, api_key, model, cache, stream)
+    return extract_resume_html(response, model)
+
+
+def add_master_resume_footer(resume_html: str, job_name: str, master_resume_url: str) -> str:
+    # Use the same job title that will be in the PDF filename
+    job_title = os.path.splitext(job_name)[0].replace('_', ' ').replace('-', ' ')
+
+    # Create two-line footer with proper spacing and link
+    footer_html = f'''
+            <div style="font-size: 8pt; color: #666; text-align: left; margin-top: 2em; padding-top: 0.5em; border-top: 1px solid #ddd;">
+                This resume was customized for {job_title}.<br>
+                To view the master resume with potentially unrelated experience, visit <a href="{master_resume_url}" style="color: #444;">{master_resume_url}</a>
+            </div>'''
+
+    # Insert footer before closing body tag if it exists, otherwise append
+    if '</body>' in resume_html:
+        return resume_html.replace('</body>', f'{footer_html}</body>')
+    return f'{resume_html}\n{footer_html}'
+
+
+def pdf_path_for(job_name: str, output_dir: str) -> str:
+    return os.path.join(output_dir, f"{os.path.splitext(job_name)[0]}_resume.pdf")
+
+
+def render_job_pdf(resume_html: str, job_name: str, output_dir: str, master_resume_url: str = None, render_pool=None) -> str:
+    """Add the optional footer and CSS to a generated resume and write it to <job>_resume.pdf.
+
+    With a ``render_pool`` (utils.pdf.RenderPool) the layout runs in a worker process.
+    """
+    # Add footer with master resume link if URL provided
+    if master_resume_url:
+        resume_html = add_master_resume_footer(resume_html, job_name, master_resume_url)
+    resume_html = inject_resume_css(resume_html, inline=False)
+    pdf_path = pdf_path_for(job_name, output_dir)
+    with span("render", job=job_name, html_bytes=len(resume_html.encode('utf-8'))) as record:
+        if render_pool is not None:
+            render_pool.submit(resume_html, pdf_path).result()
+        else:
+            render_resume_file(resume_html, pdf_path)
+        record["bytes"] = os.path.getsize(pdf_path)
+    print(f"Saved: {pdf_path}")
+    return pdf_path
+
+
+def fan_out_pdf(resume_html: str, pdf_path: str, job_name: str, output_dir: str, master_resume_url: str = None,
+                render_pool=None) -> str:
+    """Save a resume generated for a duplicate posting under ``job_name`` as well.
+
+    The PDF is copied, unless the master resume footer names the job, in which case it is
+    rendered again with this job's footer.
+    """
+    if master_resume_url:
+        return render_job_pdf(resume_html, job_name, output_dir, master_resume_url, render_pool)
+    target = pdf_path_for(job_name, output_dir)
+    shutil.copyfile(pdf_path, target)
+    print(f"Saved: {target} (duplicate of {os.path.basename(pdf_path)})")
+    return target
+
+
+def fan_out_duplicates(resume_html: str, pdf_path: str, duplicates: list, output_dir: str,
+                       master_resume_url: str = None, render_pool=None, on_saved=None) -> dict:
+    """fan_out_pdf for each job in ``duplicates``; maps each to its PDF path or the exception that stopped it."""
+    fanned_out = {}
+    for duplicate in duplicates:
+        try:
+            fanned_out[duplicate] = fan_out_pdf(resume_html, pdf_path, duplicate, output_dir, master_resume_url,
+                                                render_pool)
+            if on_saved is not None:
+                on_saved(duplicate, fanned_out[duplicate])
+        except Exception as e:
+            logging.error(f"Failed to save {duplicate} (duplicate of {os.path.basename(pdf_path)}): {e}")
+            fanned_out[duplicate] = e
+    return fanned_out
+
+
+def rank_job_sections(index, jobs: list, embed_batch_size: int = 64, job_embeddings=None) -> dict:
+    """Score every job against the resume index in batches; returns job name -> ranked sections.
+
+    ``job_embeddings`` (rows matching ``jobs``, see utils.rag.embed_jobs) skips embedding the
+    jobs again. Returns an empty dict without an index or if scoring fails, so callers fall
+    back to per-job ranking.
+    """
+    if index is None or not jobs:
+        return {}
+    try:
+        ranked = rank_sections_batch(index, [job_text for _, job_text in jobs], batch_size=embed_batch_size,
+                                     job_embeddings=job_embeddings)
+    except Exception as e:
+        logging.error(f"Batch section scoring failed, falling back to per-job ranking: {e}")
+        return {}
+    return {job_name: sections for (job_name, _), sections in zip(jobs, ranked)}
+
+
+def run_jobs(jobs: list, combined_resume: str, provider: str, api_key: str, model: str, output_dir: str,
+             coverletter: str = "", suggestions: str = "", master_resume_url: str = None, concurrency: int = 1,
+             cache=None, index=None, embed_batch_size: int = 64, on_saved=None, max_prompt_tokens: int = None,
+             render_pool=None, stream: bool = False, prompt_layout: str = "classic", duplicates: dict = None) -> dict:
+    """Generate and render a resume for every job, isolating failures per job.
+
+    Prompts are built on the calling thread (RAG is CPU-bound and shares the embedder), LLM
+    calls go through a pool of ``concurrency`` threads and each finished response is handed
+    to a render pool of the same size, so prompt building for later jobs overlaps the network
+    wait of earlier ones.
+
+    With a resume ``index``, all jobs are embedded in batches of ``embed_batch_size`` and
+    scored against the resume sections up front in a single matrix multiply. ``on_saved`` is
+    called with (job_name, pdf_path) as soon as each PDF is written. A ``render_pool``
+    (utils.pdf.RenderPool) moves PDF layout into worker processes. With ``stream`` each
+    completion is streamed and handed to the render stage as soon as </resume> arrives.
+    ``duplicates`` maps a job to near-identical jobs (not in ``jobs``) that reuse its resume
+    instead of being generated (see fan_out_pdf).
+
+    Returns:
+        Dict mapping job file name, duplicates included, to the saved PDF path, or to the
+        exception that stopped it.
+    """
+    duplicates = duplicates or {}
+    fanned_out = {}
+    ranked_sections = rank_job_sections(index, jobs, embed_batch_size)
+    job_texts = dict(jobs)
+
+    def make_prompt(job_name):
+        with span("prompt", job=job_name):
+            return build_job_prompt(combined_resume, job_texts[job_name], model, coverletter, suggestions, index,
+                                    ranked_sections.get(job_name), max_prompt_tokens, prompt_layout)
+
+    def generate(job_name, prompt):
+        with span("llm", job=job_name, model=model):
+            return extract_resume_html(call_ai_provider(prompt, provider, api_key, model, cache, stream), model)
+
+    def render(job_name, resume_html):
+        pdf_path = render_job_pdf(resume_html, job_name, output_dir, master_resume_url, render_pool)
+        if on_saved is not None:
+            on_saved(job_name, pdf_path)
+        fanned_out.update(fan_out_duplicates(resume_html, pdf_path, duplicates.get(job_name, ()), output_dir,
+                                             master_resume_url, render_pool, on_saved))
+        return pdf_path
+
+    results = run_pipeline([job_name for job_name, _ in jobs], make_prompt, generate, render, concurrency, render_pool)
+    for job_name, members in duplicates.items():
+        for duplicate in members:
+            # A failed generation fails its whole group
+            fanned_out.setdefault(duplicate, results.get(job_name, RuntimeError(f"{job_name} was not generated")))
+    results.update(fanned_out)
+    return results
+
+
+def _task_label(key) -> str:
+    return '/'.join(key) if isinstance(key, tuple) else key
+
+
+def run_pipeline(keys: list, make_prompt, generate, render, concurrency: int = 1, render_pool=None) -> dict:
+    """Drive prompt -> LLM -> render for every task key, isolating failures per task.
+
+    ``make_prompt(key)`` runs on the calling thread, ``generate(key, prompt)`` (returning
+    resume HTML) on a pool of ``concurrency`` LLM threads and ``render(key, html)`` on a
+    render pool as soon as its completion arrives. At most ``concurrency * 2`` prompts wait
+    for the LLM pool, so memory stays flat while the pool never runs dry, however many
+    tasks (jobs, or candidate/job pairs) there are.
+
+    Returns:
+        Dict mapping each key to its render result, or to the exception that stopped it.
+    """
+    results = {}
+    if concurrency <= 1:
+        for key in keys:
+            print(f"Generating resume for {_task_label(key)}...")
+            try:
+                resume_html = generate(key, make_prompt(key))
+                results[key] = render(key, resume_html)
+            except Exception as e:
+                logging.error(f"Failed to generate resume for {_task_label(key)}: {e}")
+                results[key] = e
+        return results
+
+    render_futures = {}
+    lock = threading.Lock()
+
+    def on_llm_done(key, future):
+        try:
+            render_future = render_threads.submit(render, key, future.result())
+        except Exception as e:
+            logging.error(f"Failed to generate resume for {_task_label(key)}: {e}")
+            with lock:
+                results[key] = e
+            return
+        with lock:
+            render_futures[key] = render_future
+
+    # Enough render threads to keep every worker process busy when a RenderPool is used
+    render_thread_count = max(concurrency, render_pool.workers if render_pool is not None else 0)
+    with ThreadPoolExecutor(max_workers=render_thread_count, thread_name_prefix="render") as render_threads:
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="llm") as llm_pool:
+            # Bound the number of prompts waiting on the LLM pool so memory stays flat on big batches
+            slots = threading.BoundedSemaphore(concurrency * 2)
+            for key in keys:
+                print(f"Generating resume for {_task_label(key)}...")
+                try:
+                    prompt = make_prompt(key)
+                except Exception as e:
+                    logging.error(f"Failed to build prompt for {_task_label(key)}: {e}")
+                    results[key] = e
+                    continue
+                slots.acquire()
+                future = llm_pool.submit(generate, key, prompt)
+                future.add_done_callback(lambda f: slots.release())
+                future.add_done_callback(partial(on_llm_done, key))
+        # The LLM pool has drained, so every render has been submitted by now
+        for key, render_future in render_futures.items():
+            try:
+                results[key] = render_future.result()
+            except Exception as e:
+                logging.error(f"Failed to render resume for {_task_label(key)}: {e}")
+                results[key] = e
+    return results
+
+
+@dataclass
+class Candidate:
+    """One candidate's inputs and incremental build state in --candidates mode."""
+    name: str
+    resume: str
+    coverletter: str
+    suggestions: str
+    output_dir: str
+    manifest: BuildManifest
+    job_digests: dict
+    pending: list
+    index: object = None
+
+
+def run_candidates(candidates: list, provider: str, api_key: str, model: str, master_resume_url: str = None,
+                   concurrency: int = 1, cache=None, embed_batch_size: int = 64, max_prompt_tokens: int = None,
+                   render_pool=None, stream: bool = False, prompt_layout: str = "classic",
+                   duplicates: dict = None) -> dict:
+    """Generate every pending (candidate, job) pair through one shared pipeline.
+
+    Each job posting is embedded once and its vector reused for every candidate's section
+    ranking. All pairs go through a single run_pipeline, candidate by candidate, so the LLM
+    pool stays full across candidate boundaries and consecutive prompts share a candidate's
+    prefix (see --prompt-layout cache). PDFs go to each candidate's output directory.
+    ``duplicates`` maps a (candidate name, job) pair to near-identical jobs of the same
+    candidate that reuse its resume instead of being generated, as in run_jobs.
+
+    Returns:
+        Dict mapping (candidate name, job file name), duplicates included, to the saved PDF
+        path or the exception that stopped it.
+    """
+    duplicates = duplicates or {}
+    skipped = {(key[0], job_name) for key, members in duplicates.items() for job_name in members}
+    to_generate = {candidate.name: [(job_name, job_text) for job_name, job_text in candidate.pending
+                                    if (candidate.name, job_name) not in skipped] for candidate in candidates}
+    fanned_out = {}
+    job_texts = {job_name: job_text for pending in to_generate.values() for job_name, job_text in pending}
+    job_names = sorted(job_texts)
+    job_embeddings = None
+    if job_names and any(candidate.index is not None for candidate in candidates):
+        try:
+            job_embeddings = embed_jobs([job_texts[job_name] for job_name in job_names], embed_batch_size)
+        except Exception as e:
+            logging.error(f"Job embedding failed, falling back to per-job ranking: {e}")
+    row = {job_name: i for i, job_name in enumerate(job_names)}
+    ranked_sections = {}
+    by_name = {candidate.name: candidate for candidate in candidates}
+    for candidate in candidates:
+        pending = to_generate[candidate.name]
+        if job_embeddings is None or not pending:
+            continue
+        rows = job_embeddings[[row[job_name] for job_name, _ in pending]]
+        for job_name, sections in rank_job_sections(candidate.index, pending, embed_batch_size, rows).items():
+            ranked_sections[(candidate.name, job_name)] = sections
+
+    def make_prompt(key):
+        candidate = by_name[key[0]]
+        with span("prompt", candidate=key[0], job=key[1]):
+            return build_job_prompt(candidate.resume, job_texts[key[1]], model, candidate.coverletter, candidate.suggestions,
+                                    candidate.index, ranked_sections.get(key), max_prompt_tokens, prompt_layout)
+
+    def generate(key, prompt):
+        with span("llm", candidate=key[0], job=key[1], model=model):
+            return extract_resume_html(call_ai_provider(prompt, provider, api_key, model, cache, stream), model)
+
+    def render(key, resume_html):
+        candidate = by_name[key[0]]
+        pdf_path = render_job_pdf(resume_html, key[1], candidate.output_dir, master_resume_url, render_pool)
+        on_saved = lambda job_name, path: candidate.manifest.record(job_name, candidate.job_digests[job_name], path)
+        on_saved(key[1], pdf_path)
+        for job_name, result in fan_out_duplicates(resume_html, pdf_path, duplicates.get(key, ()), candidate.output_dir,
+                                                   master_resume_url, render_pool, on_saved).items():
+            fanned_out[(key[0], job_name)] = result
+        return pdf_path
+
+    keys = [(candidate.name, job_name) for candidate in candidates for job_name, _ in to_generate[candidate.name]]
+    results = run_pipeline(keys, make_prompt, generate, render, concurrency, render_pool)
+    for key, members in duplicates.items():
+        for job_name in members:
+            # A failed generation fails its whole group
+            fanned_out.setdefault((key[0], job_name), results.get(key, RuntimeError(f"{_task_label(key)} was not generated")))
+    results.update(fanned_out)
+    return results
+
+
+def export_batch_requests(path: str, jobs: list, request_ids: dict, combined_resume: str, model: str,
+                          coverletter: str = "", suggestions: str = "", index=None, embed_batch_size: int = 64,
+                          max_prompt_tokens: int = None, prompt_layout: str = "classic") -> int:
+    """Build the prompt for every job and write them as an OpenAI Batch API input file.
+
+    ``request_ids`` maps each job name to its stable custom_id (see utils.batch.batch_custom_id),
+    which import_batch_results uses to match results to jobs and skip ones built from stale inputs.
+
+    Returns:
+        Number of requests written
+    """
+    ranked_sections = rank_job_sections(index, jobs, embed_batch_size)
+    requests = []
+    for job_name, job_text in jobs:
+        try:
+            with span("prompt", job=job_name):
+                prompt = build_job_prompt(combined_resume, job_text, model, coverletter, suggestions, index,
+                                          ranked_sections.get(job_name), max_prompt_tokens, prompt_layout)
+        except Exception as e:
+            logging.error(f"Failed to build prompt for {job_name}: {e}")
+            continue
+        requests.append((request_ids[job_name], prompt))
+    return export_batch(path, requests, model)
+
+
+def import_batch_results(path: str, jobs: list, request_ids: dict, model: str, output_dir: str,
+                         master_resume_url: str = None, concurrency: int = 1, render_pool=None, on_saved=None) -> dict:
+    """Extract the resume HTML from a Batch API output file and render every job's PDF.
+
+    Returns:
+        Dict mapping job file name to the saved PDF path, or to the exception that stopped it.
+    """
+    responses = read_batch_results(path)
+    results = {}
+    to_render = []
+    matched = 0
+    for job_name, _ in jobs:
+        response = responses.get(request_ids[job_name])
+        if response is None:
+            results[job_name] = LookupError(f"No batch result for {job_name} with its current inputs")
+            logging.error(str(results[job_name]))
+            continue
+        matched += 1
+        try:
+            if isinstance(response, Exception):
+                raise response
+            to_render.append((job_name, extract_resume_html(response, model)))
+        except Exception as e:
+            logging.error(f"Failed to generate resume for {job_name}: {e}")
+            results[job_name] = e
+    if len(responses) > matched:
+        print(f"Ignoring {len(responses) - matched} batch results for unknown or changed jobs.")
+
+    def render(job_name, resume_html):
+        pdf_path = render_job_pdf(resume_html, job_name, output_dir, master_resume_url, render_pool)
+        if on_saved is not None:
+            on_saved(job_name, pdf_path)
+        return pdf_path
+
+    workers = max(concurrency, render_pool.workers if render_pool is not None else 1)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="render") as render_threads:
+        futures = {job_name: render_threads.submit(render, job_name, html) for job_name, html in to_render}
+        for job_name, future in futures.items():
+            try:
+                results[job_name] = future.result()
+            except Exception as e:
+                logging.error(f"Failed to render resume for {job_name}: {e}")
+                results[job_name] = e
+    return results
+
+
 def main():
     load_dotenv()
     args = parse_args()
-    provider = os.environ.get("AI_PROVIDER", "openai")
-    api_key = args.openai_key or os.environ.get("OPENAI_API_KEY")
-    model = args.model or os.environ.get("OPENAI_MODEL", "gpt-4o")
-    print(f"Using model: {model}")
-    if not api_key:
-        raise RuntimeError("OpenAI API key required. Use --openai-key or set OPENAI_API_KEY env var.")
-    os.makedirs(args.output, exist_ok=True)
-    resumes = get_all_resumes(args.input)
-    coverletter_path = os.path.join(args.input, "coverletter.txt")
-    suggestions_path = os.path.join(args.input, "suggestions.txt")
+    logging.getLogger().setLevel(args.log_level)
+    configure_metrics(args.metrics_out)
+    try:
+        if args.profile is not None:
+            profile_call(partial(run, args), stats_path=args.profile or None)
+        else:
+            run(args)
+    finally:
+        close_metrics()
+
+
+def load_inputs(in_dir: str, input_cache=None) -> tuple:
+    """Read one candidate's resume files, cover letter and suggestions from ``in_dir``.
+
+    Returns:
+        (combined resume, cover letter, suggestions)
+    """
+    resumes = get_all_resumes(in_dir, input_cache)
+    coverletter_path = os.path.join(in_dir, "coverletter.txt")
+    suggestions_path = os.path.join(in_dir, "suggestions.txt")
     if os.path.exists(coverletter_path):
         print(f"Extracting text from cover letter: {coverletter_path}")
         coverletter = read_file(coverletter_path)
@@ -226,34 +715,368 @@ def main():
     combined_resume = '\n'.join([content.strip() for fname, content in resumes 
                               if fname != "coverletter.txt" and fname != "suggestions.txt"])
     print(f"Combined resume content length: {len(combined_resume)} characters")
-    jobs = read_job_files(args.jobs)
-    for job_name, job_text in jobs:
-        print(f"Generating resume for {job_name}...")
-        resume_html = generate_resume_content(combined_resume, job_text, provider, api_key, model, coverletter, suggestions)
-        
-        # Add footer with master resume link if URL provided
+    return combined_resume, coverletter, suggestions
+
+
+def build_dependencies(args, model: str, combined_resume: str, coverletter: str, suggestions: str) -> tuple:
+    """Inputs every job's output depends on, for BuildManifest digests.
+
+    Returns:
+        (prompt dependencies, render-only dependencies)
+    """
+    shared_deps = {
+        "resume": hash_text(combined_resume),
+        "coverletter": hash_text(coverletter),
+        "suggestions": hash_text(suggestions),
+        "model": model,
+        # The torch embedding backend keeps the plain model name so existing builds stay current
+        "embedding_model": embedder_key() if args.retriever == "embedding" else args.retriever,
+        # The classic layout keeps the plain version so existing builds stay current
+        "prompt_version": PROMPT_VERSION if args.prompt_layout == "classic" else f"{PROMPT_VERSION}-{args.prompt_layout}",
+        "segmenter_version": SEGMENTER_VERSION,
+        "max_prompt_tokens": args.max_prompt_tokens or 0,
+    }
+    render_deps = {
+        "css": resume_style_digest(),
+        "master_resume_url": args.master_resume_url or "",
+    }
+    return shared_deps, render_deps
+
+
+def pending_jobs(jobs: list, manifest: BuildManifest, job_digests: dict, output_dir: str, force: bool = False) -> list:
+    """Jobs whose PDF is missing or was built from different inputs (all of them with ``force``)."""
+    pending = [(job_name, job_text) for job_name, job_text in jobs
+               if force or not manifest.is_current(job_name, job_digests[job_name], pdf_path_for(job_name, output_dir))]
+    if len(pending) < len(jobs):
+        print(f"Skipping {len(jobs) - len(pending)} up-to-date resumes (use --force to rebuild).")
+    return pending
+
+
+def run_all_candidates(args, provider: str, api_key: str, model: str, cache=None, input_cache=None):
+    """--candidates: every subdirectory of --input is a candidate, generated against every job in --jobs."""
+    jobs = sorted(read_job_files(args.jobs))
+    if not jobs:
+        print(f"No job files found in {args.jobs}.")
+        return
+    names = sorted(d for d in os.listdir(args.input) if os.path.isdir(os.path.join(args.input, d)))
+    if not names:
+        print(f"No candidate directories found in {args.input}.")
+        return
+    candidates = []
+    for name in names:
+        print(f"Loading candidate {name}...")
+        combined_resume, coverletter, suggestions = load_inputs(os.path.join(args.input, name), input_cache)
+        output_dir = os.path.join(args.output, name)
+        os.makedirs(output_dir, exist_ok=True)
+        manifest = BuildManifest(output_dir)
+        shared_deps, render_deps = build_dependencies(args, model, combined_resume, coverletter, suggestions)
+        job_digests = {job_name: BuildManifest.digest(job=job_text, **shared_deps, **render_deps) for job_name, job_text in jobs}
+        pending = pending_jobs(jobs, manifest, job_digests, output_dir, args.force)
+        index = None
+        if pending and combined_resume:
+            index = build_resume_index(combined_resume, cache_dir=os.path.join(args.cache_dir, "index"))
+        candidates.append(Candidate(name, combined_resume, coverletter, suggestions, output_dir, manifest,
+                                    job_digests, pending, index))
+    pairs = [(candidate.name, job_name) for candidate in candidates for job_name, _ in candidate.pending]
+    if not pairs:
+        print("All resumes are up to date.")
+        return
+    duplicates = {}
+    all_pending = sorted({job for candidate in candidates for job in candidate.pending})
+    if not args.no_dedup and len(all_pending) > 1:
+        # Group the postings once, then reuse within each candidate's pending jobs
+        with span("dedup", jobs=len(all_pending)) as record:
+            groups = find_duplicate_groups(all_pending, args.dedup_threshold)
+            record["groups"] = len(groups)
+        for candidate in candidates:
+            pending_names = {job_name for job_name, _ in candidate.pending}
+            for group in groups:
+                members = [job_name for job_name in group if job_name in pending_names]
+                if len(members) > 1:
+                    duplicates[(candidate.name, members[0])] = members[1:]
+    render_pool = RenderPool(args.render_workers, args.max_tasks_per_child) if args.render_workers > 0 else None
+    try:
+        results = run_candidates(candidates, provider, api_key, model, args.master_resume_url, args.concurrency, cache,
+                                 args.embed_batch_size, args.max_prompt_tokens, render_pool, args.stream,
+                                 args.prompt_layout, duplicates)
+    finally:
+        if render_pool is not None:
+            render_pool.shutdown()
+    report_results(results, [(name, job_name) for name in names for job_name, _ in jobs], pairs, cache, duplicates)
+
+
+def serve(args, provider: str, api_key: str, model: str, cache=None, input_cache=None):
+    """--serve: load every candidate, the embedder and the renderer once, then answer /generate requests.
+
+    With --candidates each subdirectory of --input is a candidate addressed by its name;
+    otherwise --input is the single candidate "default".
+    """
+    from utils.server import BadRequest, UnknownCandidate, make_server
+    if args.candidates:
+        names = sorted(d for d in os.listdir(args.input) if os.path.isdir(os.path.join(args.input, d)))
+        dirs = {name: os.path.join(args.input, name) for name in names}
+    else:
+        dirs = {"default": args.input}
+    candidates = {}
+    for name, in_dir in dirs.items():
+        print(f"Loading candidate {name}...")
+        combined_resume, coverletter, suggestions = load_inputs(in_dir, input_cache)
+        index = build_resume_index(combined_resume, cache_dir=os.path.join(args.cache_dir, "index")) if combined_resume else None
+        candidates[name] = Candidate(name, combined_resume, coverletter, suggestions, None, None, {}, [], index)
+    if not candidates:
+        raise RuntimeError(f"No candidate directories found in {args.input}.")
+    render_pool = RenderPool(args.render_workers, args.max_tasks_per_child) if args.render_workers > 0 else None
+    if render_pool is None:
+        # Import WeasyPrint and load the resume fonts before the first request
+        get_resume_stylesheet()
+
+    def generate(job_text, candidate_name, fmt, job_name):
+        if candidate_name is None:
+            if len(candidates) > 1:
+                raise BadRequest(f"'candidate' is required; one of {', '.join(candidates)}")
+            candidate_name = next(iter(candidates))
+        if candidate_name not in candidates:
+            raise UnknownCandidate(candidate_name)
+        candidate = candidates[candidate_name]
+        resume_html = generate_resume_content(candidate.resume, job_text, provider, api_key, model, candidate.coverletter,
+                                              candidate.suggestions, cache, candidate.index, args.max_prompt_tokens,
+                                              args.prompt_layout, args.stream)
         if args.master_resume_url:
-            # Use the same job title that will be in the PDF filename
-            job_title = os.path.splitext(job_name)[0].replace('_', ' ').replace('-', ' ')
-            
-            # Create two-line footer with proper spacing and link
-            footer_html = f'''
-            <div style="font-size: 8pt; color: #666; text-align: left; margin-top: 2em; padding-top: 0.5em; border-top: 1px solid #ddd;">
-                This resume was customized for {job_title}.<br>
-                To view the master resume with potentially unrelated experience, visit <a href="{args.master_resume_url}" style="color: #444;">{args.master_resume_url}</a>
-            </div>'''
-            
-            # Insert footer before closing body tag if it exists, otherwise append
-            if '</body>' in resume_html:
-                resume_html = resume_html.replace('</body>', f'{footer_html}</body>')
+            resume_html = add_master_resume_footer(resume_html, job_name, args.master_resume_url)
+        if fmt == "html":
+            return "text/html; charset=utf-8", inject_resume_css(resume_html).encode('utf-8')
+        resume_html = inject_resume_css(resume_html, inline=False)
+        with span("render", job=job_name, html_bytes=len(resume_html.encode('utf-8'))) as record:
+            if render_pool is not None:
+                pdf = render_pool.submit(resume_html).result()
+            else:
+                pdf = render_resume_file(resume_html)
+            record["bytes"] = len(pdf)
+        return "application/pdf", pdf
+
+    def extra_metrics():
+        usage = prompt_cache_stats()
+        metrics = {"llm_prompt_tokens_total": usage["prompt_tokens"], "llm_cached_tokens_total": usage["cached_tokens"]}
+        if cache is not None:
+            metrics.update(response_cache_hits_total=cache.hits, response_cache_misses_total=cache.misses)
+        return metrics
+
+    server = make_server(args.serve, generate, workers=max(args.concurrency, 1), queue_size=args.queue_size,
+                         request_timeout=args.request_timeout, candidates=list(candidates), extra_metrics=extra_metrics)
+    print(f"Serving {len(candidates)} candidate(s) on {args.serve} with {server.workers} worker(s); "
+          f"POST /generate, GET /healthz, GET /metrics")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if render_pool is not None:
+            render_pool.shutdown()
+        if cache is not None:
+            cache.evict()
+
+
+def run(args):
+    """Run the CLI for parsed arguments."""
+    if args.import_time:
+        from utils.importtime import report_import_times
+        report_import_times(cwd=os.path.dirname(os.path.abspath(__file__)))
+        return
+    if args.export_onnx:
+        from utils.onnx_embedder import export_onnx_model
+        model_path = export_onnx_model(args.embedding_model, args.export_onnx)
+        print(f"Exported {args.embedding_model} to {model_path}; use --embedding-backend onnx --embedding-model {args.export_onnx}")
+        return
+    if args.render_html:
+        rendered = render_html_dir(args.render_html, args.output, args.render_workers or None, args.max_tasks_per_child)
+        for name, result in rendered:
+            if isinstance(result, Exception):
+                logging.error(f"Failed to render {name}: {result}")
             else:
-                resume_html = f'{resume_html}\n{footer_html}'
-                
-        resume_html = inject_resume_css(resume_html)
-        pdf_name = f"{os.path.splitext(job_name)[0]}_resume.pdf"
-        pdf_path = os.path.join(args.output, pdf_name)
-        html_to_pdf(resume_html, pdf_path)
-        print(f"Saved: {pdf_path}")
+                print(f"Saved: {result}")
+        failed = sum(isinstance(result, Exception) for _, result in rendered)
+        print(f"Rendered {len(rendered) - failed}/{len(rendered)} HTML files.")
+        return
+    provider = os.environ.get("AI_PROVIDER", "openai")
+    api_key = args.openai_key or os.environ.get("OPENAI_API_KEY")
+    model = args.model or os.environ.get("OPENAI_MODEL", "gpt-4o")
+    print(f"Using model: {model}")
+    triage_only = args.triage and args.top is None and args.min_score is None
+    if not api_key and not (args.batch_export or args.batch_import or triage_only):
+        raise RuntimeError("OpenAI API key required. Use --openai-key or set OPENAI_API_KEY env var.")
+    configure_openai_client(connect_timeout=args.connect_timeout, read_timeout=args.read_timeout,
+                            max_retries=args.max_retries, pool_size=max(args.concurrency, 1))
+    os.makedirs(args.output, exist_ok=True)
+    cache = None
+    if not args.no_cache:
+        cache = ResponseCache(os.path.join(args.cache_dir, "llm"), max_bytes=int(args.cache_max_mb * 1024 * 1024),
+                              max_age=args.cache_max_age_days * 86400, refresh=args.refresh)
+    input_cache = ParsedInputCache(os.path.join(args.cache_dir, "inputs"), version=CLEAN_CONTENT_VERSION)
+    # Keep a local snapshot of the embedding model so later runs load it straight from disk
+    configure_embedder(args.embedding_model, snapshot_dir=os.path.join(args.cache_dir, "models"),
+                       backend=args.embedding_backend, threads=args.embed_threads or None)
+    configure_retriever(args.retriever)
+    triage = args.triage or args.top is not None or args.min_score is not None
+    if args.watch and (args.candidates or args.serve or args.batch_export or args.batch_import or triage):
+        raise RuntimeError("--watch cannot be combined with --candidates, --serve, batch or triage options.")
+    if args.serve:
+        serve(args, provider, api_key, model, cache, input_cache)
+        return
+    if args.candidates:
+        if args.batch_export or args.batch_import:
+            raise RuntimeError("--candidates cannot be combined with --batch-export or --batch-import.")
+        if triage:
+            raise RuntimeError("--triage, --top and --min-score work on a single candidate; drop --candidates.")
+        run_all_candidates(args, provider, api_key, model, cache, input_cache)
+        return
+    combined_resume, coverletter, suggestions = load_inputs(args.input, input_cache)
+    # Snapshot the jobs directory before reading it, so files added while the first batch runs are still picked up
+    watcher = JobWatcher(args.jobs, args.watch_debounce, args.watch_poll) if args.watch else None
+    jobs = sorted(read_job_files(args.jobs))
+    if not jobs and not args.watch:
+        print(f"No job files found in {args.jobs}.")
+        return
+    index = None
+    if triage:
+        if not combined_resume:
+            raise RuntimeError("Triage needs resume text to score jobs against.")
+        index = build_resume_index(combined_resume, cache_dir=os.path.join(args.cache_dir, "index"))
+        start = time.perf_counter()
+        ranking = triage_jobs(index, jobs, args.embed_batch_size)
+        print(f"Triaged {len(jobs)} jobs in {time.perf_counter() - start:.2f}s.")
+        if args.triage:
+            write_triage_report(args.triage, ranking)
+            print(f"Wrote job ranking to {args.triage}")
+        for row in ranking[:10]:
+            print(f"  {row['rank']:>4}. {row['score']:.3f}  {row['job']}")
+        if triage_only:
+            return
+        selected = set(select_jobs(ranking, args.top, args.min_score))
+        jobs = [(job_name, job_text) for job_name, job_text in jobs if job_name in selected]
+        print(f"Generating for {len(jobs)}/{len(ranking)} best-matching jobs.")
+        if not jobs:
+            return
+    # Incremental build: skip jobs whose inputs are unchanged since their PDF was written
+    manifest = BuildManifest(args.output)
+    shared_deps, render_deps = build_dependencies(args, model, combined_resume, coverletter, suggestions)
+    job_digests = {job_name: BuildManifest.digest(job=job_text, **shared_deps, **render_deps) for job_name, job_text in jobs}
+    pending = pending_jobs(jobs, manifest, job_digests, args.output, args.force)
+    if not pending:
+        print("All resumes are up to date.")
+        if not args.watch:
+            return
+    on_saved = lambda job_name, pdf_path: manifest.record(job_name, job_digests[job_name], pdf_path)
+    # Batch request ids only cover the inputs of the prompt, so results survive CSS or footer changes
+    request_ids = {job_name: batch_custom_id(job_name, BuildManifest.digest(job=job_text, **shared_deps))
+                   for job_name, job_text in pending}
+    if args.batch_import:
+        render_pool = RenderPool(args.render_workers, args.max_tasks_per_child) if args.render_workers > 0 else None
+        try:
+            results = import_batch_results(args.batch_import, pending, request_ids, model, args.output,
+                                           args.master_resume_url, args.concurrency, render_pool, on_saved)
+        finally:
+            if render_pool is not None:
+                render_pool.shutdown()
+        report_results(results, jobs, pending)
+        return
+    # Segment and embed the resume once; later runs load the saved index instead
+    if index is None and combined_resume:
+        index = build_resume_index(combined_resume, cache_dir=os.path.join(args.cache_dir, "index"))
+    if args.batch_export:
+        count = export_batch_requests(args.batch_export, pending, request_ids, combined_resume, model, coverletter,
+                                      suggestions, index, args.embed_batch_size, args.max_prompt_tokens,
+                                      args.prompt_layout)
+        print(f"Wrote {count} batch requests to {args.batch_export}; render the results with --batch-import.")
+        return
+    render_pool = RenderPool(args.render_workers, args.max_tasks_per_child) if args.render_workers > 0 else None
+
+    def process(batch, batch_pending):
+        duplicates = {}
+        to_generate = batch_pending
+        if not args.no_dedup and len(batch_pending) > 1:
+            with span("dedup", jobs=len(batch_pending)) as record:
+                groups = find_duplicate_groups(batch_pending, args.dedup_threshold)
+                record["groups"] = len(groups)
+            duplicates = {group[0]: group[1:] for group in groups}
+            skipped = {job_name for group in groups for job_name in group[1:]}
+            to_generate = [(job_name, job_text) for job_name, job_text in batch_pending if job_name not in skipped]
+        results = run_jobs(to_generate, combined_resume, provider, api_key, model, args.output, coverletter, suggestions,
+                           args.master_resume_url, args.concurrency, cache, index, args.embed_batch_size,
+                           on_saved=on_saved, max_prompt_tokens=args.max_prompt_tokens, render_pool=render_pool,
+                           stream=args.stream, prompt_layout=args.prompt_layout, duplicates=duplicates)
+        report_results(results, batch, batch_pending, cache, duplicates)
+
+    def process_changed(batch):
+        job_digests.update({job_name: BuildManifest.digest(job=job_text, **shared_deps, **render_deps)
+                            for job_name, job_text in batch})
+        batch_pending = pending_jobs(batch, manifest, job_digests, args.output, args.force)
+        if batch_pending:
+            process(batch, batch_pending)
+
+    try:
+        if pending:
+            process(jobs, pending)
+        if watcher is not None:
+            watch_jobs(watcher, process_changed)
+    finally:
+        if watcher is not None:
+            watcher.close()
+        if render_pool is not None:
+            render_pool.shutdown()
+
+
+def watch_jobs(watcher: JobWatcher, process):
+    """--watch: hand new or modified job files to ``process`` as (name, text) pairs once they settle, until Ctrl+C.
+
+    ``watcher`` is created before the first batch reads the directory, so files dropped in
+    while that batch runs are reported here rather than lost.
+    """
+    print(f"Watching {watcher.directory} for new or modified job files ({watcher.method}); press Ctrl+C to stop.")
+    try:
+        for names in watcher.changes():
+            batch = [(name, read_file(os.path.join(watcher.directory, name))) for name in names]
+            batch = [(name, text) for name, text in batch if text and text.strip()]
+            if batch:
+                print(f"Detected {len(batch)} new or modified job file(s): {', '.join(name for name, _ in batch)}")
+                process(batch)
+    except KeyboardInterrupt:
+        print("Stopped watching.")
+
+
+def report_results(results: dict, jobs: list, pending: list, cache=None, duplicates: dict = None):
+    """Print the end-of-run summary and trim the LLM cache."""
+    failed = [job_name for job_name, result in results.items() if isinstance(result, Exception)]
+    duplicates = duplicates or {}
+    grouped = sum(len(members) for members in duplicates.values())
+    # Only a group whose first job was generated saved its calls; the others failed with it
+    reused = sum(len(members) for key, members in duplicates.items() if not isinstance(results.get(key), Exception))
+    emit("summary", jobs=len(jobs), pending=len(pending), generated=len(results) - len(failed), failed=len(failed),
+         cache_hits=cache.hits if cache is not None else None, cache_misses=cache.misses if cache is not None else None,
+         duplicate_groups=len(duplicates), duplicates=grouped, duplicates_reused=reused)
+    print(f"Generated {len(results) - len(failed)}/{len(pending)} resumes.")
+    if duplicates:
+        print(f"Deduplicated: {grouped} near-duplicate postings in {len(duplicates)} group(s); {reused} reused another "
+              f"posting's resume ({reused} LLM calls saved).")
+        for key, members in duplicates.items():
+            logging.info(f"Duplicate group: {_task_label(key)} <- {', '.join(members)}")
+    if failed:
+        print(f"Failed jobs: {', '.join(sorted(_task_label(key) for key in failed))}")
+    if cache is not None:
+        print(f"LLM cache: {cache.stats()}")
+        cache.evict()
+    usage = prompt_cache_stats()
+    if usage["requests"]:
+        emit("prompt_cache", **usage)
+        line = (f"Prompt cache: {usage['cached_tokens']}/{usage['prompt_tokens']} prompt tokens cached "
+                f"({usage['hit_ratio']:.0%}) on {usage['hit_requests']}/{usage['requests']} requests")
+        if usage["mean_hit_seconds"] is not None and usage["mean_miss_seconds"] is not None:
+            line += f"; mean latency {usage['mean_hit_seconds'] * 1000:.0f} ms with a cached prefix vs {usage['mean_miss_seconds'] * 1000:.0f} ms without"
+        if usage["mean_hit_ttft_seconds"] is not None and usage["mean_miss_ttft_seconds"] is not None:
+            line += (f"; mean time to first token {usage['mean_hit_ttft_seconds'] * 1000:.0f} ms with a cached prefix "
+                     f"vs {usage['mean_miss_ttft_seconds'] * 1000:.0f} ms without")
+        print(line)
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,83 @@
+# utils/batch.py
+"""
+OpenAI Batch API files: export chat completion requests and read back the results.
+
+Batch jobs cost half as much as live calls and take the API round trips off the critical
+path: export the requests, upload them as a batch, then import the output file and render.
+"""
+import json
+import logging
+import os
+import tempfile
+
+from utils.llm import build_chat_payload, completion_content
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+
+
+def batch_custom_id(job_name: str, digest: str) -> str:
+    """Stable request id: the job name plus a prefix of its input digest (see BuildManifest.digest).
+
+    The same job with the same inputs always gets the same id, and results exported before
+    an input changed no longer match on import.
+    """
+    return f"{os.path.splitext(job_name)[0]}-{digest[:16]}"
+
+
+def export_batch(path: str, requests: list, model: str) -> int:
+    """Write (custom_id, prompt) pairs as a Batch API input file, atomically.
+
+    Returns:
+        Number of request lines written
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            for custom_id, prompt in requests:
+                line = {"custom_id": custom_id, "method": "POST", "url": BATCH_ENDPOINT,
+                        "body": build_chat_payload(prompt, model)}
+                f.write(json.dumps(line, ensure_ascii=False) + '\n')
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return len(requests)
+
+
+def read_batch_results(path: str) -> dict:
+    """Parse a Batch API output (or error) file.
+
+    Returns:
+        Dict mapping custom_id to the completion text, or to the exception describing why
+        that request failed
+    """
+    results = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+                custom_id = entry["custom_id"]
+            except (ValueError, KeyError, TypeError) as e:
+                logging.warning(f"Skipping malformed line {line_no} in {path}: {e}")
+                continue
+            response = entry.get("response") or {}
+            if entry.get("error"):
+                error = entry["error"]
+                message = error.get("message", error) if isinstance(error, dict) else error
+                results[custom_id] = RuntimeError(f"Batch request failed: {message}")
+            elif response.get("status_code") != 200:
+                body = response.get("body") or {}
+                message = (body.get("error") or {}).get("message", "no error message")
+                results[custom_id] = RuntimeError(f"Batch request failed with HTTP {response.get('status_code')}: {message}")
+            else:
+                try:
+                    results[custom_id] = completion_content(response.get("body") or {})
+                except ValueError as e:
+                    results[custom_id] = ValueError(f"Invalid OpenAI API response: {e}")
+    return results
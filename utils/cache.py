@@ -0,0 +1,214 @@
+# utils/cache.py
+"""
+On-disk caches shared across runs.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+
+class ResponseCache:
+    """Content-addressed store for LLM completions.
+
+    Each entry is a JSON file named after the SHA-256 of its key parts and sharded by the
+    first two hex digits. Writes go to a temporary file that is atomically renamed into
+    place, so concurrent threads or processes never observe a partial entry.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 500 * 1024 * 1024, max_age: float = 30 * 86400, refresh: bool = False):
+        """
+        Args:
+            cache_dir: Directory holding the cache entries (created if missing)
+            max_bytes: Total size the store is trimmed to by evict(); 0 disables the size limit
+            max_age: Entries older than this many seconds are treated as misses; 0 disables expiry
+            refresh: Ignore existing entries but still store new responses
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.refresh = refresh
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(**parts) -> str:
+        """Hash the request parts that determine a completion into a stable hex key."""
+        payload = json.dumps(parts, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _count(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key: str):
+        """Return the cached response for ``key``, or None on a miss, expiry or refresh."""
+        if self.refresh:
+            self._count(False)
+            return None
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            self._count(False)
+            return None
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable cache entry {path}: {e}")
+            self._count(False)
+            return None
+        if self.max_age and time.time() - entry.get("created", 0) > self.max_age:
+            self._count(False)
+            return None
+        self._count(True)
+        return entry.get("response")
+
+    def put(self, key: str, response: str):
+        """Store ``response`` under ``key`` with an atomic write."""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({"created": time.time(), "response": response}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logging.warning(f"Could not write cache entry {path}: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def evict(self) -> int:
+        """Delete expired entries, then the oldest ones until the store fits in max_bytes.
+
+        Returns:
+            Number of entries removed
+        """
+        now = time.time()
+        entries = []
+        removed = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for fname in files:
+                path = os.path.join(root, fname)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                # Leftover temp files from crashed writers are always stale after an hour
+                stale_tmp = fname.endswith('.tmp') and now - st.st_mtime > 3600
+                expired = self.max_age and now - st.st_mtime > self.max_age
+                if stale_tmp or expired:
+                    removed += self._remove(path)
+                elif fname.endswith('.json'):
+                    entries.append((st.st_mtime, st.st_size, path))
+        if self.max_bytes:
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                removed += self._remove(path)
+                total -= size
+        return removed
+
+    @staticmethod
+    def _remove(path: str) -> int:
+        try:
+            os.remove(path)
+            return 1
+        except FileNotFoundError:
+            # Another worker evicted it first
+            return 0
+
+    def stats(self) -> str:
+        with self._lock:
+            return f"{self.hits} hits, {self.misses} misses"
+
+
+class ParsedInputCache:
+    """Cleaned text extracted from PDF/DOCX inputs, reused while the file is unchanged.
+
+    Entries are keyed on the absolute path and validated by size and mtime; if those
+    changed but the content hash did not (e.g. the file was copied or touched), the cached
+    text is still reused. Entries written under a different ``version`` (of the extraction
+    and cleaning code) are ignored.
+    """
+
+    def __init__(self, cache_dir: str, version: str = ""):
+        self.cache_dir = cache_dir
+        self.version = str(version)
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def _file_hash(path: str) -> str:
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                h.update(chunk)
+        return h.hexdigest()
+
+    def _entry_path(self, path: str) -> str:
+        key = hashlib.sha256(os.path.abspath(path).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _write(self, entry_path: str, entry: dict):
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, entry_path)
+        except OSError as e:
+            logging.warning(f"Could not write parsed input cache entry {entry_path}: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def get_or_extract(self, path: str, extract):
+        """Return (text, cached) for ``path``, calling ``extract(path)`` only when the file changed.
+
+        Empty extractions are not stored, so a file that parsed to nothing (for example while
+        a parser dependency was missing) is extracted again on the next run.
+        """
+        st = os.stat(path)
+        entry_path = self._entry_path(path)
+        entry = None
+        try:
+            with open(entry_path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable parsed input cache entry {entry_path}: {e}")
+        if entry and (entry.get("version") != self.version or not entry.get("text")):
+            entry = None
+        if entry and entry.get("size") == st.st_size and entry.get("mtime_ns") == st.st_mtime_ns:
+            return entry["text"], True
+        content_hash = self._file_hash(path)
+        if entry and entry.get("sha256") == content_hash:
+            entry.update(size=st.st_size, mtime_ns=st.st_mtime_ns)
+            self._write(entry_path, entry)
+            return entry["text"], True
+        text = extract(path)
+        if not text or not text.strip():
+            return text, False
+        self._write(entry_path, {
+            "path": os.path.abspath(path),
+            "version": self.version,
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "sha256": content_hash,
+            "text": text,
+        })
+        return text, False
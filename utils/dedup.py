@@ -0,0 +1,115 @@
+# utils/dedup.py
+"""
+Near-duplicate job posting detection: word shingles, MinHash signatures and LSH banding.
+
+Reposts and multi-city copies of one posting differ in a few words. Each posting becomes a
+set of word shingles, summarized by a MinHash signature; LSH buckets signatures band by
+band, so only postings sharing a bucket are compared and large feeds are not compared
+pairwise. Candidate pairs are confirmed with the exact Jaccard similarity of their shingle
+sets and merged into groups with union-find.
+"""
+import re
+import zlib
+from collections import defaultdict
+from typing import Dict, List, Set
+
+import numpy as np
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def shingles(text: str, size: int = 5) -> Set[int]:
+    """Hashed ``size``-word shingles of the lowercased text; shorter texts give one shingle."""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) <= size:
+        return {zlib.crc32(' '.join(words).encode('utf-8'))} if words else set()
+    return {zlib.crc32(' '.join(words[i:i + size]).encode('utf-8')) for i in range(len(words) - size + 1)}
+
+
+def jaccard(a: Set[int], b: Set[int]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class MinHasher:
+    """MinHash signatures of shingle sets with ``num_perm`` seeded hash functions.
+
+    Each function is multiply-shift hashing, ((a * x + b) mod 2^64) >> 32 with a random odd
+    ``a``: uint64 arithmetic wraps, so it is one vectorized multiply-add per shingle.
+    """
+
+    def __init__(self, num_perm: int = 128, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(0, np.iinfo(np.uint64).max, size=(num_perm, 1), dtype=np.uint64) | np.uint64(1)
+        self.b = rng.integers(0, np.iinfo(np.uint64).max, size=(num_perm, 1), dtype=np.uint64)
+        self.num_perm = num_perm
+
+    def signature(self, shingle_set: Set[int]) -> np.ndarray:
+        if not shingle_set:
+            return np.full(self.num_perm, np.iinfo(np.uint32).max, dtype=np.uint64)
+        x = np.fromiter(shingle_set, dtype=np.uint64, count=len(shingle_set))
+        with np.errstate(over='ignore'):
+            return ((self.a * x + self.b) >> np.uint64(32)).min(axis=1)
+
+
+class _UnionFind:
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i: int, j: int):
+        root_i, root_j = self.find(i), self.find(j)
+        if root_i != root_j:
+            # The smaller index stays the root so groups are represented by their first job
+            self.parent[max(root_i, root_j)] = min(root_i, root_j)
+
+
+def find_duplicate_groups(jobs: list, threshold: float = 0.9, shingle_size: int = 5, num_perm: int = 128,
+                          bands: int = 16) -> List[List[str]]:
+    """Group near-identical postings.
+
+    Args:
+        jobs: (job file name, job text) pairs
+        threshold: Minimum Jaccard similarity of two postings' shingle sets to merge them
+        shingle_size: Words per shingle
+        num_perm: MinHash signature length; must be divisible by ``bands``
+        bands: LSH bands; more bands catch less similar pairs at the cost of more comparisons
+
+    Returns:
+        Groups of two or more job names, each in input order (the first is the one to
+        generate), in the order of their first job
+    """
+    if num_perm % bands:
+        raise ValueError(f"num_perm ({num_perm}) must be divisible by bands ({bands})")
+    sets = [shingles(text, shingle_size) for _, text in jobs]
+    hasher = MinHasher(num_perm)
+    signatures = [hasher.signature(s) for s in sets]
+    rows = num_perm // bands
+    groups = _UnionFind(len(jobs))
+    checked = set()
+    for band in range(bands):
+        buckets = defaultdict(list)
+        for i, signature in enumerate(signatures):
+            if sets[i]:
+                buckets[signature[band * rows:(band + 1) * rows].tobytes()].append(i)
+        for members in buckets.values():
+            for pos, j in enumerate(members[1:], start=1):
+                for i in members[:pos]:
+                    if groups.find(i) == groups.find(j):
+                        break
+                    if (i, j) in checked:
+                        continue
+                    checked.add((i, j))
+                    if jaccard(sets[i], sets[j]) >= threshold:
+                        groups.union(i, j)
+                        break
+    by_root: Dict[int, List[str]] = defaultdict(list)
+    for i, (job_name, _) in enumerate(jobs):
+        by_root[groups.find(i)].append(job_name)
+    return [names for _, names in sorted(by_root.items()) if len(names) > 1]
@@ -0,0 +1,67 @@
+# utils/importtime.py
+"""
+Startup profiling: where does import time go?
+"""
+import subprocess
+import sys
+
+# Modules the CLI imports at startup, followed by the heavy dependencies it loads lazily
+STARTUP_MODULES = ["main"]
+LAZY_MODULES = ["sentence_transformers", "torch", "onnxruntime", "tokenizers", "weasyprint", "PyPDF2", "tiktoken", "docx"]
+
+
+def _parse_importtime(stderr: str) -> list:
+    """Parse ``python -X importtime`` output into (module, self_us, cumulative_us, depth) tuples."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            # One separator space, then two spaces of indent per nesting level
+            name = name[1:] if name.startswith(" ") else name
+            depth = (len(name) - len(name.lstrip(" "))) // 2
+            rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+        except ValueError:
+            continue
+    return rows
+
+
+def report_import_times(top: int = 15, cwd: str = None):
+    """Import the CLI and its lazily loaded dependencies in a fresh interpreter and print the slowest imports."""
+    modules = STARTUP_MODULES + LAZY_MODULES
+    # __import__ rather than importlib.import_module: only the former is timed by -X importtime.
+    # Failures are printed as "name<TAB>status": a module that is missing itself is "not
+    # installed"; anything else (a missing sub-dependency, a native library that will not
+    # load) is a failure of an installed package.
+    code = (
+        f"for name in {modules!r}:\n"
+        "    try:\n"
+        "        __import__(name)\n"
+        "    except ModuleNotFoundError as e:\n"
+        "        missing = e.name or ''\n"
+        "        if name == missing or name.startswith(missing + '.'):\n"
+        "            print(name + '\\tnot installed')\n"
+        "        else:\n"
+        "            print(name + '\\tfailed: ModuleNotFoundError (' + missing + ')')\n"
+        "    except Exception as e:\n"
+        "        print(name + '\\tfailed: ' + type(e).__name__)\n"
+    )
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True, cwd=cwd)
+    rows = _parse_importtime(proc.stderr)
+    top_level = {name: cumulative for name, _, cumulative, depth in rows if depth == 0}
+    failed = dict(line.split("\t", 1) for line in proc.stdout.splitlines() if "\t" in line)
+
+    def timing(name: str) -> str:
+        if name in failed:
+            return f"  {name:<30} {failed[name]}"
+        return f"  {name:<30} {top_level.get(name, 0) / 1000:>9.1f} ms"
+
+    print("Startup (imported by main.py):")
+    print(timing("main"))
+    print("Lazily loaded (only paid when used):")
+    for name in LAZY_MODULES:
+        print(timing(name))
+    print(f"Slowest individual imports (self time, top {top}):")
+    for name, self_us, _, _ in sorted(rows, key=lambda r: r[1], reverse=True)[:top]:
+        print(f"  {name:<30} {self_us / 1000:>9.1f} ms")
@@ -0,0 +1,94 @@
+# utils/lexical.py
+"""
+Torch-free lexical retriever: BM25 term weights over resume sections, scored with numpy.
+
+Sections are weighted with BM25 (idf times saturated, length-normalized term frequency)
+and L2-normalized; queries are log-scaled term counts, also normalized. A query's score
+against a section is the dot product of the two, so scores fall in [0, 1] like the cosine
+similarities of the embedding backend and job vectors do not depend on the resume they
+are scored against.
+"""
+import math
+import re
+from collections import Counter
+from typing import List, Tuple
+
+import numpy as np
+
+# Bump when tokenization or weighting changes; part of the resume index cache key
+LEXICAL_VERSION = 1
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*(?:[.\-][a-z0-9+#]+)*")
+_STOPWORDS = frozenset("""
+a about above after all also an and any are as at be been being both but by can could did do does doing
+during each for from further had has have having he her here hers him his how i if in into is it its itself
+just me more most my no nor not of off on once only or other our ours out over own same she should so some
+such than that the their theirs them then there these they this those through to too under until up very
+was we were what when where which while who whom why will with would you your yours
+""".split())
+# Rows of the query matrix built per matrix multiply, to bound memory with many jobs
+_SCORE_CHUNK = 4096
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase terms, keeping tech tokens like c++, c#, node.js and ci-cd intact; stopwords dropped."""
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS and (len(t) > 1 or t.isdigit())]
+
+
+class LexicalRetriever:
+    """BM25-weighted bag-of-words retrieval; see the module docstring."""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+
+    @property
+    def key(self) -> str:
+        return f"lexical-bm25-{LEXICAL_VERSION}-{self.k1}-{self.b}"
+
+    def encode_sections(self, sections: List[str]) -> Tuple[np.ndarray, List[str]]:
+        """BM25 weights for each section over the sections' own vocabulary.
+
+        Returns:
+            A float32 (len(sections), len(vocabulary)) matrix with L2-normalized rows, and the vocabulary
+        """
+        counts = [Counter(tokenize(section)) for section in sections]
+        df = Counter(term for c in counts for term in c)
+        vocabulary = sorted(df)
+        column = {term: i for i, term in enumerate(vocabulary)}
+        n = len(sections)
+        lengths = [sum(c.values()) for c in counts]
+        avg_length = (sum(lengths) / n) if n and sum(lengths) else 1.0
+        idf = {term: math.log(1 + (n - freq + 0.5) / (freq + 0.5)) for term, freq in df.items()}
+        matrix = np.zeros((n, len(vocabulary)), dtype=np.float32)
+        for row, (c, length) in enumerate(zip(counts, lengths)):
+            norm = self.k1 * (1 - self.b + self.b * length / avg_length)
+            for term, tf in c.items():
+                matrix[row, column[term]] = idf[term] * tf * (self.k1 + 1) / (tf + norm)
+        row_norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, row_norms, out=matrix, where=row_norms > 0)
+        return matrix, vocabulary
+
+    def encode_queries(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        """Normalized log term weights per text, as a 1-D object array of dicts (row-indexable like a matrix)."""
+        queries = np.empty(len(texts), dtype=object)
+        for i, text in enumerate(texts):
+            weights = {term: 1 + math.log(tf) for term, tf in Counter(tokenize(text)).items()}
+            norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+            queries[i] = {term: w / norm for term, w in weights.items()}
+        return queries
+
+    def score(self, queries: np.ndarray, embeddings: np.ndarray, vocabulary: List[str] = None) -> np.ndarray:
+        """(len(queries), len(sections)) scores of encoded queries against encode_sections output."""
+        column = {term: i for i, term in enumerate(vocabulary or [])}
+        scores = np.empty((len(queries), embeddings.shape[0]), dtype=np.float32)
+        for start in range(0, len(queries), _SCORE_CHUNK):
+            chunk = queries[start:start + _SCORE_CHUNK]
+            dense = np.zeros((len(chunk), embeddings.shape[1]), dtype=np.float32)
+            for row, weights in enumerate(chunk):
+                for term, w in weights.items():
+                    i = column.get(term)
+                    if i is not None:
+                        dense[row, i] = w
+            scores[start:start + len(chunk)] = dense @ embeddings.T
+        return scores
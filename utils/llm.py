@@ -3,94 +3,390 @@
 AI provider interaction utilities (OpenAI, Anthropic, etc.)
 """
 
+import email.utils
+import json
+import logging
+import os
+import random
+import threading
+import time
+
 import requests
+from requests.adapters import HTTPAdapter
+
+from utils.metrics import annotate
+
+OPENAI_URL = "https://api.openai.com/v1/chat/completions"
+# Point at another OpenAI-compatible endpoint (e.g. bench/mock_openai.py) with OPENAI_BASE_URL=http://host:port/v1
+BASE_URL_ENV = "OPENAI_BASE_URL"
+SYSTEM_MESSAGE = "You are a professional resume writer."
+DEFAULT_MAX_TOKENS = 1500
+DEFAULT_TEMPERATURE = 0.7
+
+# Status codes worth retrying: timeouts, conflicts, rate limits and transient server errors
+RETRY_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+_client_settings = {
+    "connect_timeout": 10.0,  # seconds to establish the TCP/TLS connection
+    "read_timeout": 120.0,    # seconds to wait for the completion body
+    "max_retries": 4,
+    "backoff_base": 1.0,      # first retry waits up to this many seconds
+    "backoff_max": 30.0,      # cap for exponential backoff and Retry-After
+    "pool_size": 10,
+}
+_session = None
+_session_lock = threading.Lock()
+# Provider-side prompt caching, from usage.prompt_tokens_details.cached_tokens; see prompt_cache_stats
+# Latency is kept per measure: total response time (non-streaming calls) and time to first
+# token (streams, which may be cut off early) are not comparable
+_usage_totals = {"requests": 0, "prompt_tokens": 0, "cached_tokens": 0, "hit_requests": 0, "miss_requests": 0,
+                 "hit_latency_requests": 0, "hit_latency_seconds": 0.0, "miss_latency_requests": 0, "miss_latency_seconds": 0.0,
+                 "hit_ttft_requests": 0, "hit_ttft_seconds": 0.0, "miss_ttft_requests": 0, "miss_ttft_seconds": 0.0}
+_usage_lock = threading.Lock()
+
+
+def configure_openai_client(connect_timeout: float = None, read_timeout: float = None, max_retries: int = None,
+                            pool_size: int = None, backoff_base: float = None, backoff_max: float = None):
+    """Update timeouts, retry policy and connection pool size for the shared OpenAI session.
+
+    Arguments left as None keep their current value. The pooled session is recreated on the
+    next call so a new pool size takes effect.
+    """
+    global _session
+    updates = {
+        "connect_timeout": connect_timeout,
+        "read_timeout": read_timeout,
+        "max_retries": max_retries,
+        "pool_size": pool_size,
+        "backoff_base": backoff_base,
+        "backoff_max": backoff_max,
+    }
+    with _session_lock:
+        _client_settings.update({k: v for k, v in updates.items() if v is not None})
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def _get_session() -> requests.Session:
+    """Return the process-wide keep-alive session, creating it on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            # Retries are handled in call_openai so Retry-After and jitter apply uniformly
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=_client_settings["pool_size"], max_retries=0)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def _parse_retry_after(value: str):
+    """Parse a Retry-After header given as delay-seconds or an HTTP date; returns seconds or None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def _retry_delay(attempt: int, retry_after: str = None) -> float:
+    """Seconds to sleep before retry number ``attempt`` (0-based): Retry-After if given, else full-jitter backoff."""
+    delay = _parse_retry_after(retry_after)
+    if delay is not None:
+        return min(delay, _client_settings["backoff_max"])
+    ceiling = min(_client_settings["backoff_max"], _client_settings["backoff_base"] * (2 ** attempt))
+    return random.uniform(0, ceiling)
+
+
+def _record_usage(usage: dict, seconds: float = None, ttft: float = None) -> int:
+    """Add one response's token usage to the prompt cache totals; returns its cached tokens.
+
+    ``seconds`` is the total response time of a complete call and ``ttft`` the time to
+    first token of a stream; each goes into its own hit/miss means.
+    """
+    cached = (usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0
+    with _usage_lock:
+        _usage_totals["requests"] += 1
+        _usage_totals["prompt_tokens"] += usage.get("prompt_tokens") or 0
+        _usage_totals["cached_tokens"] += cached
+        kind = "hit" if cached else "miss"
+        _usage_totals[f"{kind}_requests"] += 1
+        if seconds is not None:
+            _usage_totals[f"{kind}_latency_requests"] += 1
+            _usage_totals[f"{kind}_latency_seconds"] += seconds
+        if ttft is not None:
+            _usage_totals[f"{kind}_ttft_requests"] += 1
+            _usage_totals[f"{kind}_ttft_seconds"] += ttft
+    return cached
+
+
+def prompt_cache_stats() -> dict:
+    """Prompt tokens served from the provider's prefix cache so far, and mean latency with and without a hit.
+
+    ``mean_*_seconds`` average the total time of non-streaming calls, ``mean_*_ttft_seconds``
+    the time to first token of streamed ones; each is None until a call of that kind is seen.
+    """
+    with _usage_lock:
+        totals = dict(_usage_totals)
+
+    def mean(kind: str, measure: str):
+        n = totals[f"{kind}_{measure}_requests"]
+        return totals[f"{kind}_{measure}_seconds"] / n if n else None
+
+    return {
+        "requests": totals["requests"],
+        "prompt_tokens": totals["prompt_tokens"],
+        "cached_tokens": totals["cached_tokens"],
+        "hit_ratio": totals["cached_tokens"] / totals["prompt_tokens"] if totals["prompt_tokens"] else 0.0,
+        "hit_requests": totals["hit_requests"],
+        "mean_hit_seconds": mean("hit", "latency"),
+        "mean_miss_seconds": mean("miss", "latency"),
+        "mean_hit_ttft_seconds": mean("hit", "ttft"),
+        "mean_miss_ttft_seconds": mean("miss", "ttft"),
+    }
+
+
+def openai_url() -> str:
+    """Chat completions endpoint: OPENAI_BASE_URL + /chat/completions if set, else OPENAI_URL."""
+    base_url = os.environ.get(BASE_URL_ENV)
+    if base_url:
+        return f"{base_url.rstrip('/')}/chat/completions"
+    return OPENAI_URL
+
+
+def _post_with_retries(url: str, headers: dict, data: dict, stream: bool = False) -> requests.Response:
+    """POST through the pooled session, retrying connection errors, timeouts and retryable status codes.
+
+    With ``stream`` the body is left unread so server-sent events can be consumed as they arrive.
+    """
+    session = _get_session()
+    timeout = (_client_settings["connect_timeout"], _client_settings["read_timeout"])
+    max_retries = _client_settings["max_retries"]
+    for attempt in range(max_retries + 1):
+        try:
+            resp = session.post(url, headers=headers, json=data, timeout=timeout, stream=stream)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            if attempt >= max_retries:
+                raise
+            delay = _retry_delay(attempt)
+            logging.warning(f"OpenAI request failed ({e.__class__.__name__}); retrying in {delay:.1f}s ({attempt + 1}/{max_retries})")
+            time.sleep(delay)
+            continue
+        if resp.status_code in RETRY_STATUS_CODES and attempt < max_retries:
+            delay = _retry_delay(attempt, resp.headers.get("Retry-After"))
+            logging.warning(f"OpenAI returned HTTP {resp.status_code}; retrying in {delay:.1f}s ({attempt + 1}/{max_retries})")
+            resp.close()
+            time.sleep(delay)
+            continue
+        return resp
+
+
+def build_chat_payload(prompt: str, model: str, max_tokens: int = DEFAULT_MAX_TOKENS) -> dict:
+    """Chat completions request body for one resume prompt (shared by live calls and batch export)."""
+    return {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": SYSTEM_MESSAGE},
+            {"role": "user", "content": prompt}
+        ],
+        "max_tokens": max_tokens,
+        "temperature": DEFAULT_TEMPERATURE,  # Keep moderate creativity
+        "presence_penalty": 0.1,  # Slight penalty to avoid repetition
+        "frequency_penalty": 0.1  # Slight penalty to improve diversity
+    }
 
-def call_openai(prompt: str, api_key: str, model: str, max_tokens: int = 1500) -> str:
+
+def completion_content(response_json: dict) -> str:
+    """Message text of a chat completions response.
+
+    Raises:
+        ValueError: If the response has no choices, message or content
+    """
+    if not response_json.get("choices"):
+        raise ValueError("No choices in OpenAI response")
+
+    choice = response_json["choices"][0]
+    if not choice.get("message"):
+        raise ValueError("No message in OpenAI response choice")
+
+    content = choice["message"].get("content")
+    if not content:
+        raise ValueError("No content in OpenAI response message")
+    return content
+
+
+def _request_error(e: requests.exceptions.RequestException) -> RuntimeError:
+    """RuntimeError carrying the API's error message when the response has one."""
+    if hasattr(e, 'response') and e.response is not None:
+        try:
+            error_detail = e.response.json()
+            error_message = error_detail.get('error', {}).get('message', str(e))
+            return RuntimeError(f"OpenAI API request failed: {error_message}")
+        except (ValueError, AttributeError):
+            # If we can't parse the error JSON, fall back to the basic error
+            return RuntimeError(f"OpenAI API request failed: {str(e)}")
+    return RuntimeError(f"OpenAI API request failed: {str(e)}")
+
+
+def call_openai(prompt: str, api_key: str, model: str, max_tokens: int = DEFAULT_MAX_TOKENS) -> str:
     """Call OpenAI API with error handling and optimized parameters.
-    
+
+    Requests go through a shared keep-alive connection pool and transient failures
+    (connection errors, timeouts, 429 and 5xx responses) are retried with exponential
+    backoff and jitter, honouring Retry-After. See configure_openai_client.
+
     Args:
         prompt: The input prompt
         api_key: OpenAI API key
         model: Model name (e.g. 'gpt-4')
         max_tokens: Maximum tokens in response (default 1500 for resume generation)
-    
+
     Returns:
         Generated text response
-        
+
     Raises:
-        requests.exceptions.RequestException: For API connection errors
+        RuntimeError: For API connection errors or failed requests once retries are exhausted
         ValueError: For invalid responses or missing data
     """
-    url = "https://api.openai.com/v1/chat/completions"
+    url = openai_url()
     headers = {
         "Authorization": f"Bearer {api_key}",
         "Content-Type": "application/json",
         "Accept": "application/json"
     }
-    data = {
-        "model": model,
-        "messages": [
-            {"role": "system", "content": "You are a professional resume writer."},
-            {"role": "user", "content": prompt}
-        ],
-        "max_tokens": max_tokens,
-        "temperature": 0.7,  # Keep moderate creativity
-        "presence_penalty": 0.1,  # Slight penalty to avoid repetition
-        "frequency_penalty": 0.1  # Slight penalty to improve diversity
-    }
-    
+    data = build_chat_payload(prompt, model, max_tokens)
+
+    start = time.perf_counter()
     try:
-        resp = requests.post(
-            url,
-            headers=headers,
-            json=data,
-            timeout=120  # 2 minute timeout for longer generations
-        )
+        resp = _post_with_retries(url, headers, data)
         resp.raise_for_status()
         response_json = resp.json()
-        
-        # Validate response structure
-        if not response_json.get("choices"):
-            raise ValueError("No choices in OpenAI response")
-            
-        choice = response_json["choices"][0]
-        if not choice.get("message"):
-            raise ValueError("No message in OpenAI response choice")
-            
-        content = choice["message"].get("content")
-        if not content:
-            raise ValueError("No content in OpenAI response message")
-            
+        content = completion_content(response_json)
+
+        usage = response_json.get("usage") or {}
+        cached_tokens = _record_usage(usage, seconds=time.perf_counter() - start)
+        annotate(prompt_tokens=usage.get("prompt_tokens"), completion_tokens=usage.get("completion_tokens"),
+                 cached_tokens=cached_tokens, response_bytes=len(resp.content))
         return content
             
     except requests.exceptions.Timeout:
         raise RuntimeError("OpenAI API request timed out")
     except requests.exceptions.RequestException as e:
-        if hasattr(e, 'response') and e.response is not None:
-            try:
-                error_detail = e.response.json()
-                error_message = error_detail.get('error', {}).get('message', str(e))
-                raise RuntimeError(f"OpenAI API request failed: {error_message}")
-            except (ValueError, AttributeError):
-                # If we can't parse the error JSON, fall back to the basic error
-                raise RuntimeError(f"OpenAI API request failed: {str(e)}")
-        else:
-            raise RuntimeError(f"OpenAI API request failed: {str(e)}")
+        raise _request_error(e)
     except (KeyError, ValueError) as e:
         raise ValueError(f"Invalid OpenAI API response: {str(e)}")
     except Exception as e:
         raise RuntimeError(f"Unexpected error calling OpenAI API: {str(e)}")
 
+def call_openai_stream(prompt: str, api_key: str, model: str, max_tokens: int = DEFAULT_MAX_TOKENS,
+                       stop_tag: str = "</resume>") -> str:
+    """Stream a completion over server-sent events and stop reading once ``stop_tag`` arrives.
+
+    Anything the model writes after the closing tag is never waited for, which cuts the
+    tail latency of each job. Time to first token is recorded on the current metrics span
+    (``ttft_ms``) and logged at INFO. Retries, timeouts and errors behave like call_openai.
+
+    Returns:
+        The text received up to and including ``stop_tag`` (or the whole completion if the
+        tag never appears)
+    """
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json",
+        "Accept": "text/event-stream"
+    }
+    data = build_chat_payload(prompt, model, max_tokens)
+    data["stream"] = True
+    data["stream_options"] = {"include_usage": True}
+    tag = stop_tag.lower()
+
+    start = time.perf_counter()
+    parts = []
+    window = ""  # tail of the text so far, enough to spot a tag split across chunks
+    ttft = None
+    stopped = False
+    usage = {}
+    try:
+        resp = _post_with_retries(openai_url(), headers, data, stream=True)
+        with resp:
+            resp.raise_for_status()
+            for line in resp.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                payload = line[5:].strip()
+                if payload == "[DONE]":
+                    break
+                event = json.loads(payload)
+                usage = event.get("usage") or usage
+                if not event.get("choices"):
+                    continue
+                delta = event["choices"][0].get("delta", {}).get("content")
+                if not delta:
+                    continue
+                if ttft is None:
+                    ttft = time.perf_counter() - start
+                parts.append(delta)
+                window = window[-len(tag):] + delta.lower()
+                if tag in window:
+                    # Closing the response drops the connection instead of reading the commentary
+                    stopped = True
+                    break
+    except requests.exceptions.Timeout:
+        raise RuntimeError("OpenAI API request timed out")
+    except requests.exceptions.RequestException as e:
+        raise _request_error(e)
+    except (KeyError, ValueError) as e:
+        raise ValueError(f"Invalid OpenAI API stream event: {str(e)}")
+    content = "".join(parts)
+    if not content:
+        raise ValueError("Invalid OpenAI API response: No content in OpenAI stream")
+    if ttft is not None:
+        logging.info(f"Time to first token: {ttft * 1000:.0f} ms")
+    # Usage only arrives in the final event, so streams cut off at </resume> have none;
+    # time to first token is the latency that prefix caching improves
+    cached_tokens = _record_usage(usage, ttft=ttft) if usage else None
+    annotate(stream=True, ttft_ms=round(ttft * 1000, 3) if ttft is not None else None, stopped_early=stopped,
+             prompt_tokens=usage.get("prompt_tokens"), completion_tokens=usage.get("completion_tokens"),
+             cached_tokens=cached_tokens)
+    return content
+
 # Placeholder for Anthropic Claude
 # def call_claude(prompt: str, api_key: str, model: str) -> str:
 #     ...
 
 # Add more providers as needed
 
-def call_ai_provider(prompt: str, provider: str, api_key: str, model: str) -> str:
-    if provider == "openai":
-        return call_openai(prompt, api_key, model)
+def call_ai_provider(prompt: str, provider: str, api_key: str, model: str, cache=None, stream: bool = False) -> str:
+    """Dispatch a prompt to the configured provider, serving repeats from ``cache`` when given.
+
+    The cache key covers everything that determines the completion: provider, model,
+    system message, prompt, temperature and max_tokens. With ``stream`` the completion is
+    streamed and cut off after </resume> (see call_openai_stream).
+    """
+    key = None
+    if cache is not None:
+        key = cache.make_key(provider=provider, model=model, system=SYSTEM_MESSAGE, prompt=prompt,
+                             temperature=DEFAULT_TEMPERATURE, max_tokens=DEFAULT_MAX_TOKENS)
+        cached = cache.get(key)
+        annotate(cache_hit=cached is not None)
+        if cached is not None:
+            return cached
+    if provider == "openai" and stream:
+        response = call_openai_stream(prompt, api_key, model)
+    elif provider == "openai":
+        response = call_openai(prompt, api_key, model)
     # elif provider == "anthropic":
-    #     return call_claude(prompt, api_key, model)
+    #     response = call_claude(prompt, api_key, model)
     else:
         raise ValueError(f"Unknown AI provider: {provider}")
+    if cache is not None:
+        cache.put(key, response)
+    return response
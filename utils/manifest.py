@@ -0,0 +1,69 @@
+# utils/manifest.py
+"""
+Build manifest for incremental runs: remembers which inputs produced each output PDF.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+
+MANIFEST_NAME = ".resume-manifest.json"
+
+
+def hash_text(text: str) -> str:
+    return hashlib.sha256((text or "").encode('utf-8')).hexdigest()
+
+
+class BuildManifest:
+    """Per-job dependency hashes stored as JSON in the output directory.
+
+    The manifest is rewritten atomically after every finished job, so a run that crashes
+    partway leaves an accurate record and the next run only redoes the missing jobs.
+    """
+
+    def __init__(self, output_dir: str):
+        self.path = os.path.join(output_dir, MANIFEST_NAME)
+        self._lock = threading.Lock()
+        self.entries = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f).get("jobs", {})
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable build manifest {self.path}: {e}")
+
+    @staticmethod
+    def digest(**deps) -> str:
+        """Combine named dependency values (text or hashes) into one stable hash."""
+        h = hashlib.sha256()
+        for name in sorted(deps):
+            h.update(name.encode('utf-8') + b'\0' + hash_text(str(deps[name])).encode('ascii') + b'\n')
+        return h.hexdigest()
+
+    def is_current(self, job_name: str, digest: str, pdf_path: str) -> bool:
+        """True if the job was last built from the same inputs and its PDF still exists."""
+        entry = self.entries.get(job_name)
+        return bool(entry) and entry.get("digest") == digest and os.path.isfile(pdf_path)
+
+    def record(self, job_name: str, digest: str, pdf_path: str):
+        """Remember a finished job and flush the manifest to disk."""
+        with self._lock:
+            self.entries[job_name] = {"digest": digest, "pdf": os.path.basename(pdf_path)}
+            self._save()
+
+    def _save(self):
+        directory = os.path.dirname(self.path) or "."
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=MANIFEST_NAME, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({"version": 1, "jobs": self.entries}, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logging.warning(f"Could not write build manifest {self.path}: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
@@ -0,0 +1,100 @@
+# utils/metrics.py
+"""
+Per-stage timing spans written as JSON lines, and an optional cProfile/tracemalloc wrapper.
+"""
+import contextvars
+import json
+import logging
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+_sink = None
+_sink_lock = threading.Lock()
+# Record of the innermost open span on this thread, so nested code can annotate it
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+def configure_metrics(path: str = None):
+    """Append span records to ``path`` as JSON lines; None turns recording off."""
+    global _sink
+    with _sink_lock:
+        if _sink is not None:
+            _sink.close()
+        _sink = open(path, 'a', encoding='utf-8') if path else None
+
+
+def close_metrics():
+    configure_metrics(None)
+
+
+def emit(event: str, **fields):
+    """Write one record (no-op unless configure_metrics was given a path)."""
+    if _sink is None:
+        return
+    line = json.dumps({"ts": round(time.time(), 6), "event": event, **fields}, ensure_ascii=False, default=str)
+    with _sink_lock:
+        if _sink is not None:
+            _sink.write(line + '\n')
+            _sink.flush()
+
+
+@contextmanager
+def span(stage: str, **fields):
+    """Time a pipeline stage and emit it as a ``span`` record.
+
+    The yielded dict (and annotate() from code running inside the span) adds fields such
+    as token counts, bytes or cache hits. Failed spans are recorded with ``ok: false``.
+    """
+    record = dict(fields)
+    token = _current_span.set(record)
+    start = time.perf_counter()
+    ok = True
+    try:
+        yield record
+    except BaseException as e:
+        ok = False
+        record["error"] = f"{e.__class__.__name__}: {e}"
+        raise
+    finally:
+        _current_span.reset(token)
+        emit("span", stage=stage, ms=round((time.perf_counter() - start) * 1000, 3), ok=ok,
+             thread=threading.current_thread().name, **record)
+
+
+def annotate(**fields):
+    """Add fields to the innermost open span on this thread, if any."""
+    record = _current_span.get()
+    if record is not None:
+        record.update(fields)
+
+
+def profile_call(func, top: int = 25, stats_path: str = None):
+    """Run ``func()`` under cProfile and tracemalloc, then print the hottest functions and allocation sites.
+
+    Args:
+        func: Zero-argument callable to profile
+        top: Number of functions and allocation sites to list
+        stats_path: Optional file for the raw pstats data (open with snakeviz, pstats, ...)
+    """
+    import cProfile
+    import pstats
+    import tracemalloc
+    profiler = cProfile.Profile()
+    tracemalloc.start()
+    try:
+        return profiler.runcall(func)
+    finally:
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        if stats_path:
+            profiler.dump_stats(stats_path)
+            logging.info(f"Wrote profile stats to {stats_path}")
+        out = sys.stderr
+        print(f"\n=== Top {top} functions by cumulative time ===", file=out)
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(top)
+        print(f"=== Top {top} allocation sites (peak traced memory {peak / 1024 / 1024:.1f} MB) ===", file=out)
+        for stat in snapshot.statistics("lineno")[:top]:
+            print(f"  {stat}", file=out)
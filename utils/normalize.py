@@ -0,0 +1,167 @@
+# utils/normalize.py
+"""
+Single-pass text normalization shared by input parsing and section cleaning.
+
+The text is tokenized line by line with one precompiled pattern and every fix (overspaced
+letters, broken URLs and emails, bullet markers, whitespace) is applied while walking the
+tokens once, so run time is linear in the input size. None of the patterns below can
+backtrack across more than a single token.
+"""
+import re
+
+# Runs of non-space characters, or of horizontal whitespace
+_TOKEN_RE = re.compile(r'\S+|[^\S\n]+')
+# Where a URL may start: scheme, www., common profile hosts, or a path with 2+ segments
+_URL_START_RE = re.compile(r'https?:/*|www\.|(?:github|linkedin)\.com/|/[^/\s]+/[^/\s]', re.IGNORECASE)
+_EMAIL_RE = re.compile(r'[A-Za-z0-9._%+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}')
+
+BULLET_MARKERS = '•∙⋅●'
+LIST_MARKERS = ('-', '*')
+# A URL fragment ending in one of these continues into the next token, and so does a next
+# token starting with one of them
+_URL_JOIN_AFTER = '/:-_=&?#%~+'
+_URL_JOIN_BEFORE = '/.-_=&?#%~'
+# A token made only of these separates a URL from the text after it: "url - Portfolio", "url | GitHub"
+_URL_SEPARATORS = '-–—|·/'
+_URL_SCHEME_RE = re.compile(r'[a-z]+:/*', re.IGNORECASE)
+_MAX_EMAIL_LENGTH = 254
+
+
+def _is_single_char(word: str) -> bool:
+    return len(word) == 1 and word.isalnum()
+
+
+def _has_path(url: str) -> bool:
+    """Whether the URL fragment has a path segment beyond its host: "github.com/" has none."""
+    scheme = _URL_SCHEME_RE.match(url)
+    return '/' in url[scheme.end() if scheme else 0:].rstrip('/')
+
+
+def _continues_url(last_char: str, word: str, gap: int, has_path: bool) -> bool:
+    """Whether ``word``, ``gap`` spaces after a URL fragment ending in ``last_char``, is a broken-off piece of it.
+
+    Extraction splits URLs at single spaces, so a wider gap or a separator token ends the
+    URL. After a slash, a plain word only continues a URL that has no path yet
+    (``has_path`` false: "https:// github.com/ user"); "example.com/jane/ for roles" keeps
+    "for" apart.
+    """
+    if gap != 1 or not word.strip(_URL_SEPARATORS):
+        return False
+    if last_char == '/':
+        return not has_path or any(c.isdigit() or c in _URL_JOIN_BEFORE for c in word.rstrip('.,;:!?)'))
+    if last_char in _URL_JOIN_AFTER or word[0] in _URL_JOIN_BEFORE:
+        return True
+    # "example. com/path": only join lowercase continuations so "site.com. Next" stays apart
+    return last_char == '.' and (word[0].islower() or word[0].isdigit())
+
+
+def _join_email(words: list, i: int):
+    """Join ``words[i:]`` around '@' and '.' into an email address; returns (email, next index) or (None, i)."""
+    acc = words[i]
+    j = i + 1
+    while j < len(words) and len(acc) <= _MAX_EMAIL_LENGTH and (acc[-1] in '@.' or words[j][0] in '@.'):
+        if '@' in words[j] and '@' in acc:
+            # An address has a single '@'; stop rather than scanning into the next one
+            break
+        acc += words[j]
+        j += 1
+    if j > i + 1 and _EMAIL_RE.fullmatch(acc):
+        return acc, j
+    return None, i
+
+
+def _normalize_words(words: list, gaps: list) -> list:
+    """Merge broken tokens on one line. ``gaps[k]`` is the whitespace width before ``words[k]``."""
+    out = []
+    n = len(words)
+    i = 0
+    # Set after a long overspaced run so the short words that follow it ("D o e") join too
+    overspaced = False
+    while i < n:
+        word = words[i]
+        # Overspaced text from PDF extraction: "J o h n  D o e" -> "John Doe"
+        if _is_single_char(word):
+            j = i + 1
+            while j < n and gaps[j] == 1 and _is_single_char(words[j]):
+                j += 1
+            if j - i >= 4 or (overspaced and j - i >= 2):
+                out.append(''.join(words[i:j]))
+                overspaced = True
+                i = j
+                continue
+        overspaced = False
+        # URLs split across spaces: "https:// github.com/ user" -> "https://github.com/user"
+        if _URL_START_RE.match(word):
+            j = i + 1
+            has_path = False
+            while j < n:
+                # Once a fragment has a path it keeps it, so this rescans at most a couple of times
+                if words[j - 1][-1] == '/' and not has_path:
+                    has_path = _has_path(''.join(words[i:j]))
+                if not _continues_url(words[j - 1][-1], words[j], gaps[j], has_path):
+                    break
+                j += 1
+            url = ''.join(words[i:j])
+            if url[:4].lower() == 'www.':
+                url = 'https://' + url
+            out.append(url)
+            i = j
+            continue
+        # Emails split across spaces: "jane @ example . com" -> "jane@example.com"
+        if '@' in word or (i + 1 < n and words[i + 1][0] == '@'):
+            email, j = _join_email(words, i)
+            if email:
+                out.append(email)
+                i = j
+                continue
+        out.append(word)
+        i += 1
+    return out
+
+
+def normalize_text(text: str, bullet: str = '- ', max_blank_lines: int = 1) -> str:
+    """Normalize extracted resume or job text in one linear pass.
+
+    Args:
+        text: Raw text, e.g. from a PDF extraction
+        bullet: Marker that replaces list bullets (•, ∙, ⋅, ●, - and *) at the start of a line
+        max_blank_lines: Consecutive blank lines to keep; 0 drops blank lines entirely
+
+    Returns:
+        Text with collapsed whitespace, trimmed lines, unified bullets and repaired URLs/emails
+    """
+    lines = []
+    blank_run = 0
+    for raw_line in text.replace('\r\n', '\n').replace('\r', '\n').split('\n'):
+        words = []
+        gaps = []
+        gap = 0
+        for match in _TOKEN_RE.finditer(raw_line):
+            token = match.group(0)
+            if token[0].isspace():
+                gap = len(token)
+            else:
+                words.append(token)
+                gaps.append(gap)
+                gap = 0
+        if not words:
+            blank_run += 1
+            if lines and blank_run <= max_blank_lines:
+                lines.append('')
+            continue
+        blank_run = 0
+
+        is_bullet = False
+        if words[0] in LIST_MARKERS or words[0] in BULLET_MARKERS:
+            is_bullet = True
+            words, gaps = words[1:], gaps[1:]
+        elif words[0][0] in BULLET_MARKERS:
+            # Bullet glued to the text: "•Built ..."
+            is_bullet = True
+            words[0] = words[0][1:]
+        if not words:
+            # A bare marker with nothing after it
+            continue
+        line = ' '.join(_normalize_words(words, gaps))
+        lines.append(bullet + line if is_bullet else line)
+    return '\n'.join(lines).strip()
@@ -0,0 +1,132 @@
+# utils/onnx_embedder.py
+"""
+Int8-quantized ONNX export of a sentence-transformers model, run with onnxruntime on CPU.
+
+export_onnx_model needs torch, sentence-transformers, onnx and onnxruntime; OnnxEmbedder only
+needs onnxruntime and tokenizers, so an exported model runs without torch installed. Both
+optional packages are listed in requirements-onnx.txt.
+"""
+import json
+import logging
+import os
+from typing import List, Optional, Union
+
+import numpy as np
+
+ONNX_CONFIG_FILE = "onnx_config.json"
+
+
+def export_onnx_model(model_name: str, output_dir: str, quantize: bool = True, opset: int = 14) -> str:
+    """Export a sentence-transformers model to ONNX in ``output_dir``, int8-quantized by default.
+
+    Writes the transformer graph (model.onnx, plus model_int8.onnx when quantizing), the
+    tokenizer files and an onnx_config.json describing pooling and normalization, so
+    OnnxEmbedder reproduces SentenceTransformer.encode.
+
+    Returns:
+        Path of the model file OnnxEmbedder will load
+    """
+    try:
+        import torch
+        from sentence_transformers import SentenceTransformer
+        if quantize:
+            # Imported up front so a missing package fails before the slow export
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+    except ImportError as e:
+        raise RuntimeError(f"Exporting to ONNX needs the {e.name} package; install it with: pip install -r requirements.txt "
+                           f"-r requirements-onnx.txt") from e
+    model = SentenceTransformer(model_name, device='cpu')
+    transformer = model[0]
+    tokenizer = transformer.tokenizer
+    pooling = next((m for m in model if m.__class__.__name__ == "Pooling"), None)
+    if pooling is not None and pooling.get_pooling_mode_str() not in ("mean", "cls"):
+        raise RuntimeError(f"Unsupported pooling mode for ONNX export: {pooling.get_pooling_mode_str()}")
+    os.makedirs(output_dir, exist_ok=True)
+    sample = tokenizer(["A sample sentence for tracing."], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names + ["last_hidden_state"]}
+    fp32_path = os.path.join(output_dir, "model.onnx")
+    transformer.auto_model.eval()
+    with torch.no_grad():
+        torch.onnx.export(transformer.auto_model, tuple(sample[name] for name in input_names), fp32_path,
+                          input_names=input_names, output_names=["last_hidden_state"], dynamic_axes=dynamic_axes,
+                          opset_version=opset)
+    model_file = "model.onnx"
+    if quantize:
+        quantize_dynamic(fp32_path, os.path.join(output_dir, "model_int8.onnx"), weight_type=QuantType.QInt8)
+        model_file = "model_int8.onnx"
+    tokenizer.save_pretrained(output_dir)
+    config = {
+        "source_model": model_name,
+        "model_file": model_file,
+        "max_seq_length": model.max_seq_length,
+        "dimension": model.get_sentence_embedding_dimension(),
+        "pooling": pooling.get_pooling_mode_str() if pooling is not None else "mean",
+        "normalize": any(m.__class__.__name__ == "Normalize" for m in model),
+        "pad_token": tokenizer.pad_token,
+        "pad_token_id": tokenizer.pad_token_id,
+    }
+    with open(os.path.join(output_dir, ONNX_CONFIG_FILE), 'w', encoding='utf-8') as f:
+        json.dump(config, f, indent=2)
+    return os.path.join(output_dir, model_file)
+
+
+class OnnxEmbedder:
+    """Drop-in for SentenceTransformer.encode backed by an export_onnx_model directory."""
+
+    def __init__(self, model_dir: str, threads: Optional[int] = None):
+        """
+        Args:
+            model_dir: Directory written by export_onnx_model
+            threads: onnxruntime intra-op threads; None lets onnxruntime pick (one per core)
+        """
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+        try:
+            with open(os.path.join(model_dir, ONNX_CONFIG_FILE), 'r', encoding='utf-8') as f:
+                self.config = json.load(f)
+        except (OSError, ValueError) as e:
+            raise RuntimeError(f"{model_dir} is not an exported ONNX embedding model (run --export-onnx first): {e}")
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+        model_path = os.path.join(model_dir, self.config["model_file"])
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {node.name for node in self.session.get_inputs()}
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=self.config["max_seq_length"])
+        self.tokenizer.enable_padding(pad_id=self.config.get("pad_token_id") or 0,
+                                      pad_token=self.config.get("pad_token") or "[PAD]")
+        logging.info(f"Loaded ONNX embedding model {model_path} ({self.config['source_model']})")
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.config["dimension"]
+
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32, convert_to_numpy: bool = True,
+               normalize_embeddings: bool = False, **kwargs) -> np.ndarray:
+        """Embed one sentence (1-D result) or a list (2-D float32, one row per sentence)."""
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        # Batch similar lengths together so little of each batch is padding
+        order = np.argsort([-len(text) for text in texts], kind='stable')
+        embeddings = np.empty((len(texts), self.config["dimension"]), dtype=np.float32)
+        for start in range(0, len(texts), batch_size):
+            rows = order[start:start + batch_size]
+            encodings = self.tokenizer.encode_batch([texts[i] for i in rows])
+            mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+            feeds = {"input_ids": np.array([e.ids for e in encodings], dtype=np.int64), "attention_mask": mask}
+            if "token_type_ids" in self.input_names:
+                feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+            hidden = self.session.run(None, feeds)[0]
+            if self.config["pooling"] == "cls":
+                pooled = hidden[:, 0]
+            else:
+                weights = mask[:, :, None].astype(np.float32)
+                pooled = (hidden * weights).sum(axis=1) / np.clip(weights.sum(axis=1), 1e-9, None)
+            embeddings[rows] = pooled
+        if normalize_embeddings or self.config.get("normalize"):
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            np.divide(embeddings, norms, out=embeddings, where=norms > 0)
+        return embeddings[0] if single else embeddings
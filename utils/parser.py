@@ -5,9 +5,13 @@ Markdown and job description parsing utilities.
 from pathlib import Path
 import logging
 import os
+from utils.normalize import normalize_text
 
 logging.basicConfig(level=logging.WARNING)
 
+# Bump when clean_content output changes so cached extractions are redone
+CLEAN_CONTENT_VERSION = 3
+
 def read_file(path: str) -> str:
     try:
         with open(path, 'r', encoding='utf-8') as f:
@@ -37,54 +41,9 @@ def read_job_files(jobs_dir: str) -> list:
     return job_files
 
 def clean_content(text: str) -> str:
-    """Clean parsed content to reduce tokens and fix common parsing issues."""
-    import re
-    
-    def fix_spacing(match):
-        """Fix overspaced content while preserving intended spaces."""
-        text = match.group(0)
-        # Only join if it looks like unintended spacing
-        if all(c.isalnum() or c in ':/.-_@' for c in text.replace(' ', '')):
-            return ''.join(text.split())
-        return text
-    
-    def fix_url_spacing(match):
-        """Clean up URLs with improper spacing."""
-        url = ''.join(match.group(0).split())
-        if url.startswith('www'):
-            url = 'https://' + url
-        return url
-    
-    def fix_email_spacing(match):
-        """Clean up email addresses with improper spacing."""
-        local = match.group(1).strip()
-        domain = ''.join(match.group(2).split())
-        return f"{local}@{domain}"
+    """Clean parsed content to reduce tokens and fix common parsing issues.
 
-    # Fix overspaced content first
-    text = re.sub(r'(?:[a-zA-Z0-9][\s.]){3,}[a-zA-Z0-9]', fix_spacing, text)
-    
-    # Fix URLs with improper spacing - match more variants
-    url_patterns = [
-        r'(?:https?:/*|www\.)\s*[^\s]+(?:\s+[^\s]+)*(?=[\s<]|$)',  # Basic URLs
-        r'(?:github\.com|linkedin\.com)/\s*[^\s]+(?:\s+[^\s]+)*',   # Common platforms
-        r'(?:\/[^\s]+){2,}(?:\s+[^\s]+)*'                          # Path-like URLs
-    ]
-    for pattern in url_patterns:
-        text = re.sub(pattern, fix_url_spacing, text, flags=re.IGNORECASE)
-    
-    # Fix email addresses with better pattern matching
-    email_pattern = r'([a-zA-Z0-9._%+-]+)\s*@\s*([a-zA-Z0-9.-]+\s*\.\s*[a-zA-Z]{2,})'
-    text = re.sub(email_pattern, fix_email_spacing, text)
-    
-    # Normalize bullet points and lists
-    text = re.sub(r'(?:^|\n)\s*[•∙⋅●]\s*', '\n- ', text)  # Convert various bullets to dashes
-    text = re.sub(r'(?:^|\n)\s*[-*]\s+', '\n- ', text)    # Normalize list markers
-    
-    # Fix multi-line content
-    text = re.sub(r'\n{3,}', '\n\n', text)            # Max 2 newlines
-    text = re.sub(r'[ \t]+', ' ', text)               # Normalize spaces/tabs
-    text = re.sub(r'[ \t]*\n[ \t]*', '\n', text)     # Clean line endings
-    text = text.strip()                               # Final cleanup
-    
-    return text
+    Overspaced words, broken URLs and emails, bullet markers and whitespace are all
+    fixed in a single linear pass (see utils.normalize).
+    """
+    return normalize_text(text, bullet='- ', max_blank_lines=1)
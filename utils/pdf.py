@@ -2,10 +2,204 @@
 """
 PDF generation utilities using WeasyPrint.
 """
-from weasyprint import HTML
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
 
-def html_to_pdf(html: str, output_path: str):
-    """Convert HTML to PDF using WeasyPrint."""
-    HTML(string=html).write_pdf(output_path)
+# Render resources shared by every document in this process
+_font_config = None
+_resume_stylesheet = None
+_url_fetcher = None
+_fetch_cache = {}
+# Reentrant: compiling the stylesheet loads @font-face files through the url fetcher
+_resources_lock = threading.RLock()
+
+
+def _check_remote_fetch(url: str):
+    if url.startswith(("http://", "https://")) and os.environ.get("RESUME_ALLOW_REMOTE_FETCH") != "1":
+        raise ValueError(f"Remote fetch disabled for offline rendering: {url}")
+
+
+def caching_url_fetcher(url: str, timeout: int = 10, ssl_context=None):
+    """WeasyPrint (< 70) url_fetcher that serves each local resource from memory after its first load.
+
+    Remote (http/https) resources are refused unless RESUME_ALLOW_REMOTE_FETCH=1, so a stray
+    <link> or <img> can never stall a render on a machine without network access.
+    """
+    from weasyprint import default_url_fetcher
+    with _resources_lock:
+        cached = _fetch_cache.get(url)
+    if cached is not None:
+        return dict(cached)
+    _check_remote_fetch(url)
+    result = default_url_fetcher(url, timeout=timeout, ssl_context=ssl_context)
+    if "file_obj" in result:
+        file_obj = result.pop("file_obj")
+        try:
+            result["string"] = file_obj.read()
+        finally:
+            file_obj.close()
+    with _resources_lock:
+        _fetch_cache[url] = result
+    return dict(result)
+
+
+def get_url_fetcher():
+    """caching_url_fetcher behaviour in the form the installed WeasyPrint expects.
+
+    WeasyPrint 70 replaced url_fetcher functions returning dicts with URLFetcher subclasses
+    whose fetch returns a URLFetcherResponse; older versions get caching_url_fetcher itself.
+    """
+    global _url_fetcher
+    with _resources_lock:
+        if _url_fetcher is not None:
+            return _url_fetcher
+    try:
+        from weasyprint.urls import URLFetcher, URLFetcherResponse
+    except ImportError:
+        fetcher = caching_url_fetcher
+    else:
+        class CachingURLFetcher(URLFetcher):
+            def fetch(self, url, headers=None):
+                with _resources_lock:
+                    cached = _fetch_cache.get(url)
+                if cached is None:
+                    _check_remote_fetch(url)
+                    response = super().fetch(url, headers)
+                    try:
+                        cached = (response.url, response.read(), dict(response.headers.items()), response.status)
+                    finally:
+                        response.close()
+                    with _resources_lock:
+                        _fetch_cache[url] = cached
+                response_url, body, response_headers, status = cached
+                return URLFetcherResponse(response_url, body, response_headers, status)
+
+        fetcher = CachingURLFetcher()
+    with _resources_lock:
+        if _url_fetcher is None:
+            _url_fetcher = fetcher
+        return _url_fetcher
+
+
+def get_font_config():
+    """Shared FontConfiguration so @font-face files are loaded once per process."""
+    global _font_config
+    with _resources_lock:
+        if _font_config is None:
+            from weasyprint.text.fonts import FontConfiguration
+            _font_config = FontConfiguration()
+        return _font_config
+
+
+def get_resume_stylesheet():
+    """The resume's @font-face rules compiled once into a reusable weasyprint.CSS object.
+
+    Stylesheets passed to write_pdf have user origin, which ranks below the author styles in
+    the document, so only the font rules live here; inject_resume_css(html, inline=False)
+    keeps the layout rules in the document.
+    """
+    global _resume_stylesheet
+    font_config = get_font_config()
+    url_fetcher = get_url_fetcher()
+    with _resources_lock:
+        if _resume_stylesheet is None:
+            from weasyprint import CSS
+            from utils.pdf_style import font_face_css
+            _resume_stylesheet = CSS(string=font_face_css(), font_config=font_config,
+                                     url_fetcher=url_fetcher)
+        return _resume_stylesheet
+
+
+def html_to_pdf(html: str, output_path: str = None, stylesheets: list = None):
+    """Convert HTML to PDF using WeasyPrint.
+
+    Resources go through get_url_fetcher and the shared FontConfiguration; pass
+    ``stylesheets=[get_resume_stylesheet()]`` for HTML prepared with
+    inject_resume_css(html, inline=False).
+
+    Returns:
+        The PDF bytes when ``output_path`` is None, otherwise None
+    """
+    # Imported here so CLI startup does not pay for WeasyPrint's font stack
+    from weasyprint import HTML
+    return HTML(string=html, url_fetcher=get_url_fetcher()).write_pdf(
+        output_path, stylesheets=stylesheets, font_config=get_font_config())
+
+
+def render_resume_file(html: str, output_path: str = None):
+    """Render resume HTML prepared with inject_resume_css(html, inline=False) using the shared stylesheet.
+
+    Returns:
+        ``output_path``, or the PDF bytes when it is None
+    """
+    pdf = html_to_pdf(html, output_path, stylesheets=[get_resume_stylesheet()])
+    return output_path if output_path else pdf
+
+
+def _warm_render_worker():
+    """Process initializer: import WeasyPrint and load the resume fonts once per worker."""
+    get_resume_stylesheet()
+
+
+class RenderPool:
+    """Pool of warmed worker processes rendering resumes in parallel.
+
+    WeasyPrint layout is CPU-bound and holds the GIL, so threads cannot use more than one
+    core. Workers are started with the spawn method, warmed by _warm_render_worker and
+    replaced after ``max_tasks_per_child`` renders to contain WeasyPrint's memory growth.
+    """
+
+    def __init__(self, workers: int = None, max_tasks_per_child: int = 50):
+        self.workers = workers or os.cpu_count() or 1
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_warm_render_worker,
+            max_tasks_per_child=max_tasks_per_child or None,
+        )
+
+    def submit(self, html: str, output_path: str = None):
+        """Queue one render; returns a Future resolving to ``output_path`` (or the PDF bytes without one)."""
+        return self._executor.submit(render_resume_file, html, output_path)
+
+    def render_many(self, items: list) -> list:
+        """Render (html, output_path) pairs; results come back in input order as paths or exceptions."""
+        futures = [self.submit(html, output_path) for html, output_path in items]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+
+def render_html_dir(html_dir: str, output_dir: str, workers: int = None, max_tasks_per_child: int = 50) -> list:
+    """Render every .html file in ``html_dir`` to <name>.pdf in ``output_dir`` with the resume stylesheet.
+
+    Returns:
+        (file name, PDF path or exception) pairs in file name order
+    """
+    from utils.pdf_style import inject_resume_css
+    os.makedirs(output_dir, exist_ok=True)
+    names = sorted(f for f in os.listdir(html_dir) if f.lower().endswith((".html", ".htm")))
+    items = []
+    for name in names:
+        with open(os.path.join(html_dir, name), 'r', encoding='utf-8') as f:
+            html = inject_resume_css(f.read(), inline=False)
+        items.append((html, os.path.join(output_dir, f"{os.path.splitext(name)[0]}.pdf")))
+    with RenderPool(workers, max_tasks_per_child) as pool:
+        return list(zip(names, pool.render_many(items)))
 
 # Add more PDF-related utilities as needed
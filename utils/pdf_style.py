@@ -1,19 +1,19 @@
-def inject_resume_css(html: str) -> str:
-    """Inject strict, classic Serif-style CSS into HTML resume for PDF output, using Google Fonts (Inter). Use smaller font and tighter spacing."""
-    import os
-    # Get footer info from environment
-    master_url = os.environ.get('RESUME_MASTER_URL', '')
-    job_title = os.environ.get('RESUME_JOB_TITLE', '')
-    
-    # Add hidden elements for footer content
-    html = f'''
-        <span style="display: none" data-master-url="{master_url}"></span>
-        <span style="display: none" data-job-title="{job_title}"></span>
-    ''' + html
+# utils/pdf_style.py
+"""
+Resume stylesheet and local font setup for PDF output.
+"""
+import glob
+import hashlib
+import os
 
-    google_fonts_link = '<link href="https://fonts.googleapis.com/css2?family=Inter:wght@400;600;700&display=swap" rel="stylesheet">'
-    css = """
-    <style>
+# User-supplied fonts live here; drop Inter .woff2/.woff/.ttf/.otf files in to use them. Nothing
+# is fetched from the network, so rendering works offline.
+FONTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fonts")
+
+_FONT_WEIGHTS = {"thin": 100, "extralight": 200, "light": 300, "regular": 400, "medium": 500,
+                 "semibold": 600, "bold": 700, "extrabold": 800, "black": 900}
+
+RESUME_CSS = """
       @page {
         margin: 0.4in;
         background: #fff;
@@ -217,10 +217,74 @@ def inject_resume_css(html: str) -> str:
       ul ul ul, ol ul ul {
         list-style-type: square;
       }
+"""
+
+
+def font_files(fonts_dir: str = FONTS_DIR) -> list:
+    """(path, CSS font-weight) of the upright Inter files found in ``fonts_dir``."""
+    files = []
+    for path in sorted(glob.glob(os.path.join(fonts_dir, "Inter*"))):
+        name, ext = os.path.splitext(os.path.basename(path))
+        if ext.lower() not in (".woff2", ".woff", ".ttf", ".otf") or "italic" in name.lower():
+            continue
+        style = name.split("-", 1)[1].lower() if "-" in name else ""
+        # Files without a weight suffix (Inter.ttf, InterVariable.ttf) are variable fonts
+        files.append((path, str(_FONT_WEIGHTS[style]) if style in _FONT_WEIGHTS else "100 900"))
+    return files
+
+
+def font_face_css(fonts_dir: str = FONTS_DIR) -> str:
+    """@font-face rules for the Inter files found in ``fonts_dir``, referenced by file:// URL."""
+    rules = []
+    for path, weight in font_files(fonts_dir):
+        url = "file://" + os.path.abspath(path).replace(os.sep, "/")
+        rules.append(f"@font-face {{ font-family: 'Inter'; src: url('{url}'); font-weight: {weight}; font-style: normal; }}")
+    return "\n".join(rules)
+
+
+def resume_style_digest(fonts_dir: str = FONTS_DIR) -> str:
+    """Hash of RESUME_CSS and of each font's name, weight and contents, for build manifests.
+
+    Font paths are left out so moving the checkout does not invalidate every PDF.
+    """
+    digest = hashlib.sha256(RESUME_CSS.encode('utf-8'))
+    for path, weight in font_files(fonts_dir):
+        digest.update(f"\0{os.path.basename(path)}\0{weight}\0".encode('utf-8'))
+        with open(path, 'rb') as f:
+            digest.update(hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()
+
+
+def resume_stylesheet_text() -> str:
+    """Full resume CSS: local @font-face rules followed by RESUME_CSS."""
+    return font_face_css() + RESUME_CSS
+
+
+def inject_resume_css(html: str, inline: bool = True) -> str:
+    """Inject strict, classic Serif-style CSS into HTML resume for PDF output, using local Inter fonts when present. Use smaller font and tighter spacing.
+
+    With ``inline=False`` the @font-face rules are left out; pass the compiled stylesheet
+    from utils.pdf.get_resume_stylesheet to html_to_pdf instead, so the fonts are loaded once
+    per process rather than once per document. The layout rules stay in the document, where
+    they cascade with any styles in the generated HTML as author styles.
+    """
+    # Get footer info from environment
+    master_url = os.environ.get('RESUME_MASTER_URL', '')
+    job_title = os.environ.get('RESUME_JOB_TITLE', '')
+    
+    # Add hidden elements for footer content
+    html = f'''
+        <span style="display: none" data-master-url="{master_url}"></span>
+        <span style="display: none" data-job-title="{job_title}"></span>
+    ''' + html
+
+    css = f"""
+    <style>
+{resume_stylesheet_text() if inline else RESUME_CSS}
     </style>
     """
-    # Inject Google Fonts link and CSS after <head> or at the top if no <head>
+    # Inject CSS after <head> or at the top if no <head>
     if '<head>' in html:
-        return html.replace('<head>', f'<head>{google_fonts_link}{css}')
+        return html.replace('<head>', f'<head>{css}')
     else:
-        return google_fonts_link + css + html
+        return css + html
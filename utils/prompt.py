@@ -1,32 +1,13 @@
-def build_resume_prompt(keywords: str, relevant_sections: list, job_summary: str, coverletter: str = "", suggestions: str = "") -> str:
-    coverletter_instruction = ""
-    if coverletter:
-        coverletter_instruction = (
-            "- Use the writing style, tone, and any relevant details from the provided cover letter as additional context, especially for the summary and overall resume tone. "
-            "Do not include the cover letter text in the resume itself. Incorporate any specific examples or anecdotes from the cover letter that demonstrate the candidate's qualifications, "
-            "rephrasing as needed for resume style.\n"
-            "COVER LETTER CONTEXT:\n" + coverletter.strip()
-        )
-    suggestions_instruction = ""
-    if suggestions:
-        suggestions_instruction = (
-            "- Use the following user-provided suggestions to enhance the resume, but do not fabricate information. "
-            "Only include details that are supported by the resume or job description, or that clarify or expand on existing content.\n"
-            "SUGGESTIONS CONTEXT:\n" + suggestions.strip()
-        )
-    prompt = f"""
-You are an expert resume writer and career coach. Rewrite and tailor the resume below to perfectly match the job description, maximizing the candidate's chances of getting an interview. Your output must be a complete, ready-to-use HTML resume that highlights the candidate's most relevant experience, skills, and achievements. Do not include any commentary or explanation—only the HTML resume.
-
-IMPORTANT JOB REQUIREMENTS:
-{keywords}
+# Bump whenever the prompt wording changes so incremental builds regenerate affected resumes
+PROMPT_VERSION = 1
 
-MOST RELEVANT RESUME SECTIONS:
-{'\n'.join(relevant_sections)}
+# "classic" leads with the job; "cache" puts the static instructions and candidate context
+# first so every job shares one long prompt prefix that providers can cache
+PROMPT_LAYOUTS = ("classic", "cache")
 
-JOB SUMMARY:
-{job_summary}
+PROMPT_INTRO = """You are an expert resume writer and career coach. Rewrite and tailor the resume below to perfectly match the job description, maximizing the candidate's chances of getting an interview. Your output must be a complete, ready-to-use HTML resume that highlights the candidate's most relevant experience, skills, and achievements. Do not include any commentary or explanation—only the HTML resume."""
 
-Instructions:
+RESUME_INSTRUCTIONS = """Instructions:
 
 CONTENT & TAILORING:
 - Extract and interpret all requirements, skills, and responsibilities from the job description, focusing on core qualifications and duties.
@@ -75,5 +56,49 @@ ATS & ACCESSIBILITY:
 
 OTHER:
 - If a cover letter is provided, use it to enhance the summary and overall tone of the resume.
-{suggestions_instruction}{coverletter_instruction}"""
-    return prompt
+"""
+
+
+def _context_instructions(coverletter: str, suggestions: str) -> str:
+    coverletter_instruction = ""
+    if coverletter:
+        coverletter_instruction = (
+            "- Use the writing style, tone, and any relevant details from the provided cover letter as additional context, especially for the summary and overall resume tone. "
+            "Do not include the cover letter text in the resume itself. Incorporate any specific examples or anecdotes from the cover letter that demonstrate the candidate's qualifications, "
+            "rephrasing as needed for resume style.\n"
+            "COVER LETTER CONTEXT:\n" + coverletter.strip()
+        )
+    suggestions_instruction = ""
+    if suggestions:
+        suggestions_instruction = (
+            "- Use the following user-provided suggestions to enhance the resume, but do not fabricate information. "
+            "Only include details that are supported by the resume or job description, or that clarify or expand on existing content.\n"
+            "SUGGESTIONS CONTEXT:\n" + suggestions.strip()
+        )
+    return suggestions_instruction + coverletter_instruction
+
+
+def build_resume_prompt(keywords: str, relevant_sections: list, job_summary: str, coverletter: str = "", suggestions: str = "",
+                        layout: str = "classic") -> str:
+    """Assemble the resume prompt.
+
+    The "cache" layout emits the same text in a different order: instructions, cover
+    letter and suggestions, then the resume sections, with the job keywords and summary
+    last. Jobs for one candidate then share everything up to the sections, which lets
+    provider-side prompt caching apply; pass the sections in a stable (resume) order to
+    extend the shared prefix further.
+    """
+    sections = '\n'.join(relevant_sections)
+    context = _context_instructions(coverletter, suggestions)
+    if layout == "cache":
+        return (f"\n{PROMPT_INTRO}\n\n{RESUME_INSTRUCTIONS}{context}\n\n"
+                f"RESUME SECTIONS:\n{sections}\n\n"
+                f"IMPORTANT JOB REQUIREMENTS:\n{keywords}\n\n"
+                f"JOB SUMMARY:\n{job_summary}\n")
+    if layout != "classic":
+        raise ValueError(f"Unknown prompt layout: {layout}")
+    return (f"\n{PROMPT_INTRO}\n\n"
+            f"IMPORTANT JOB REQUIREMENTS:\n{keywords}\n\n"
+            f"MOST RELEVANT RESUME SECTIONS:\n{sections}\n\n"
+            f"JOB SUMMARY:\n{job_summary}\n\n"
+            f"{RESUME_INSTRUCTIONS}{context}")
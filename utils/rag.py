@@ -1,10 +1,141 @@
-from typing import List, Tuple
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+import hashlib
+import json
+import os
 import re
-from sentence_transformers import SentenceTransformer, util
+import threading
+import numpy as np
 import logging
+from utils.metrics import span
+from utils.segment import SEGMENTER_VERSION, paragraph_chunks, parse_resume, section_chunks
 
-# Load a small, fast embedding model (can be swapped for another)
-_embedder = SentenceTransformer('all-MiniLM-L6-v2')
+# A small, fast embedding model (can be swapped for another). It is loaded on first use so
+# that importing this module does not pull in torch.
+EMBEDDING_MODEL_NAME = 'all-MiniLM-L6-v2'
+# "torch" runs SentenceTransformer; "onnx" runs an int8 export under onnxruntime (see utils.onnx_embedder)
+EMBEDDING_BACKENDS = ("torch", "onnx")
+_embedder = None
+_embedder_settings = {
+    "model_name": EMBEDDING_MODEL_NAME,
+    "snapshot_dir": None,  # directory holding local copies of models, see configure_embedder
+    "backend": "torch",
+    "threads": None,
+}
+_embedder_lock = threading.Lock()
+# Backends for ranking resume sections and job sentences; see get_retriever
+RETRIEVERS = ("embedding", "lexical")
+_retriever_name = "embedding"
+
+
+def configure_embedder(model_name: Optional[str] = None, snapshot_dir: Optional[str] = None,
+                       backend: Optional[str] = None, threads: Optional[int] = None):
+    """Choose the embedding model and where to keep a local snapshot of it.
+
+    When ``snapshot_dir`` is set, the model is saved there after its first download and
+    later runs load it straight from disk, skipping the model hub lookup. ``model_name``
+    may also be a path to a local model directory; with the "onnx" ``backend`` it must be
+    a directory written by utils.onnx_embedder.export_onnx_model. ``threads`` caps the CPU
+    threads used for inference.
+    """
+    global _embedder
+    if backend and backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend {backend!r}; expected one of {', '.join(EMBEDDING_BACKENDS)}")
+    with _embedder_lock:
+        if model_name:
+            _embedder_settings["model_name"] = model_name
+        if snapshot_dir:
+            _embedder_settings["snapshot_dir"] = snapshot_dir
+        if backend:
+            _embedder_settings["backend"] = backend
+        if threads:
+            _embedder_settings["threads"] = threads
+        _embedder = None
+
+
+def embedding_model_name() -> str:
+    return _embedder_settings["model_name"]
+
+
+def embedder_key() -> str:
+    """The model name, prefixed with the backend unless it is torch, for cache keys and build manifests."""
+    backend = _embedder_settings["backend"]
+    model_name = _embedder_settings["model_name"]
+    return model_name if backend == "torch" else f"{backend}:{model_name}"
+
+
+def get_embedder():
+    """Return the shared embedder, importing torch (or onnxruntime) and loading the model on first call."""
+    global _embedder
+    with _embedder_lock:
+        if _embedder is None and _embedder_settings["backend"] == "onnx":
+            from utils.onnx_embedder import OnnxEmbedder
+            try:
+                _embedder = OnnxEmbedder(_embedder_settings["model_name"], threads=_embedder_settings["threads"])
+            except ImportError as e:
+                raise RuntimeError(f"The onnx embedding backend needs the {e.name or 'onnxruntime'} package; "
+                                   f"install it with: pip install -r requirements-onnx.txt") from e
+        if _embedder is None:
+            from sentence_transformers import SentenceTransformer
+            if _embedder_settings["threads"]:
+                import torch
+                torch.set_num_threads(_embedder_settings["threads"])
+            model_name = _embedder_settings["model_name"]
+            snapshot_dir = _embedder_settings["snapshot_dir"]
+            snapshot = None
+            if snapshot_dir and not os.path.isdir(model_name):
+                snapshot = os.path.join(snapshot_dir, model_name.replace('/', '__'))
+            if snapshot and os.path.isfile(os.path.join(snapshot, 'modules.json')):
+                _embedder = SentenceTransformer(snapshot, device='cpu')
+            else:
+                _embedder = SentenceTransformer(model_name, device='cpu')
+                if snapshot:
+                    try:
+                        _embedder.save(snapshot)
+                    except OSError as e:
+                        logging.warning(f"Could not save embedding model snapshot to {snapshot}: {e}")
+        return _embedder
+
+
+class EmbeddingRetriever:
+    """Dense retrieval with the sentence-transformers model (see get_embedder).
+
+    A retriever encodes resume sections into a matrix (plus an optional vocabulary), encodes
+    queries into row-indexable vectors, and scores the two; utils.lexical.LexicalRetriever
+    is the torch-free alternative.
+    """
+
+    @property
+    def key(self) -> str:
+        """Identifies the backend and model in index cache keys."""
+        return embedder_key()
+
+    def encode_sections(self, sections: List[str]) -> Tuple[np.ndarray, Optional[List[str]]]:
+        embeddings = get_embedder().encode(sections, convert_to_numpy=True, normalize_embeddings=True)
+        return np.asarray(embeddings, dtype=np.float32), None
+
+    def encode_queries(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        embeddings = get_embedder().encode(texts, batch_size=batch_size, convert_to_numpy=True, normalize_embeddings=True)
+        return np.asarray(embeddings, dtype=np.float32).reshape(len(texts), -1)
+
+    def score(self, queries: np.ndarray, embeddings: np.ndarray, vocabulary: Optional[List[str]] = None) -> np.ndarray:
+        return queries @ embeddings.T
+
+
+def configure_retriever(name: str = "embedding"):
+    """Select the retrieval backend: "embedding" (sentence-transformers) or "lexical" (BM25, no torch)."""
+    global _retriever_name
+    if name not in RETRIEVERS:
+        raise ValueError(f"Unknown retriever {name!r}; expected one of {', '.join(RETRIEVERS)}")
+    _retriever_name = name
+
+
+def get_retriever():
+    """Return the configured retriever; the lexical one never imports torch."""
+    if _retriever_name == "lexical":
+        from utils.lexical import LexicalRetriever
+        return LexicalRetriever()
+    return EmbeddingRetriever()
 
 
 def extract_keywords(text: str, top_n: int = 7) -> List[str]:
@@ -36,120 +167,204 @@ def extract_keywords(text: str, top_n: int = 7) -> List[str]:
     return list(dict.fromkeys(filtered))[:top_n]
 
 
-from typing import List, Tuple, Optional
+def segment_resume(resume: str, section_headers: Optional[List[str]] = None) -> Tuple[List[str], List[bool]]:
+    """Split resume into granular, deduplicated subsections in one pass (see utils.segment).
+
+    Returns:
+        The section texts and, for each one, whether it is a critical section kept whole
+        (contact info, education, experience, ...) rather than split into entries.
+    """
+    tree = parse_resume(resume, section_headers)
+    if all(section.is_preamble for section in tree):
+        # Fallback: split by blank lines if no headings found
+        sections = paragraph_chunks(resume)
+        return sections, [False] * len(sections)
+    return section_chunks(tree)
 
-def most_relevant_resume_sections(resume: str, job: str, section_headers: Optional[List[str]] = None, top_k: int = 8) -> List[str]:
-    """Split resume into granular subsections, rank by similarity to job post, and return the most relevant.
-    Automatically includes critical sections like contact info and education."""
-    
-    # Define critical sections that should always be included
-    critical_sections = {"contact", "education", "certifications", "awards", "projects", "experience", "skills", "summary"}
-    if not resume or not job:
-        logging.warning("Empty resume or job description provided to most_relevant_resume_sections.")
-        return [resume]
-    if section_headers is None:
-        section_headers = [ 
-            "Summary", "Experience", "Work Experience", "Professional Experience",
-            "Education", "Skills", "Projects", "Certifications", "Awards"
-        ]
-
-    # Flexible heading detection: markdown, ALL CAPS, headings ending with colon
-    heading_patterns = []
-    # More specific patterns first
-    for header in section_headers:
-        # Markdown headings (## or #)
-        heading_patterns.append(rf'##?\s*{header}.*?(?=\n##? |\Z)')
-        # ALL CAPS variations
-        heading_patterns.append(rf'^{header.upper()}.*?(?=\n[A-Z][A-Z\s]+|\Z)')
-        # Title case with colon
-        heading_patterns.append(rf'^{header}:.*?(?=\n[A-Z][a-z]+:|\Z)')
-        # Underlined headings
-        heading_patterns.append(rf'{header}\n[-=]+\n.*?(?=\n[^\n]+\n[-=]+\n|\Z)')
-    
-    # More generic patterns last
-    heading_patterns += [
-        r'^[A-Z][A-Z\s]{3,}$',             # ALL CAPS headings (at least 4 chars)
-        r'^[A-Z][a-z\s]+:$',                # Title case with colon
-        r'^.{4,}:\s*$',                     # Any text ending with colon (at least 4 chars)
-    ]
-    
-    sections = []
-    for pat in heading_patterns:
-        matches = list(re.finditer(pat, resume, re.MULTILINE | re.DOTALL | re.IGNORECASE))
-        for match in matches:
-            section = match.group(0)
-            if len(section.strip()) > 40:
-                # Try to get section title from first line
-                section_title_match = re.match(r'^[^\n]+', section)
-                if section_title_match:
-                    section_title = section_title_match.group(0).lower()
-                    # Check if this is a critical section (contact, education, etc)
-                    is_critical = any(crit in section_title for crit in critical_sections)
-                    
-                    # Keep critical sections together
-                    if is_critical:
-                        sections.append(section.strip())
-                    else:
-                        # Split into bullet points while preserving structure
-                        bullet_pattern = r'\s*[-*•]\s+|\s*\d+\.\s+'
-                        lines = section.split('\n')
-                        current_section = []
-                        
-                        for line in lines:
-                            line = line.strip()
-                            if not line:
-                                continue
-                            # If it's a bullet point or starts a new entry, add to sections
-                            if re.match(bullet_pattern, line) or re.match(r'[A-Z][a-z]+\s+\d{4}', line):
-                                if current_section:
-                                    joined = ' '.join(current_section)
-                                    if len(joined) > 40:
-                                        sections.append(joined)
-                                    current_section = []
-                            # Add line to current section
-                            if line:
-                                current_section.append(line)
-                        
-                        # Add final section
-                        if current_section:
-                            joined = ' '.join(current_section)
-                            if len(joined) > 40:
-                                sections.append(joined)
-
-    # Fallback: split by blank lines if no headings found
-    if not sections:
-        cleaned = re.sub(r'Page \d+|\f|\n+', '\n', resume)
-        raw_sections = re.split(r'\n{2,}', cleaned)
-        sections = [s.strip() for s in raw_sections if len(s.strip()) > 40]
-        sections = list(dict.fromkeys(sections))
 
-    # Always include sections with URLs or key terms
+def _is_extra_section(section: str) -> bool:
+    """Sections with URLs or key terms (awards, projects, contact...) are always included."""
     extra_keywords = [
         "award", "certification", "notable project", "project", "github.com", 
         "interest", "github", "website", "link", "honor", "volunteer", 
         "publication", "contact", "portfolio", "demo"
     ]
-    extra_sections = []
-    for s in sections:
-        if any(re.search(k, s, re.IGNORECASE) for k in extra_keywords) or re.search(r'https?://', s):
-            extra_sections.append(s)
+    return any(re.search(k, section, re.IGNORECASE) for k in extra_keywords) or bool(re.search(r'https?://', section))
+
+
+@dataclass
+class ResumeIndex:
+    """Resume sections with their metadata and a float32 embedding matrix, built once per resume."""
+    sections: List[str]
+    critical: List[bool]
+    extra: List[bool]
+    embeddings: np.ndarray  # (len(sections), dim), L2-normalized so a dot product is cosine similarity
+    resume_hash: str
+    model_name: str  # retriever key (see EmbeddingRetriever.key)
+    vocabulary: Optional[List[str]] = None  # column terms, for lexical retrievers
+
+
+def _index_cache_paths(cache_dir: str, resume_hash: str, model_name: str) -> Tuple[str, str]:
+    key = hashlib.sha256(f"{model_name}\0{SEGMENTER_VERSION}\0{resume_hash}".encode('utf-8')).hexdigest()[:32]
+    base = os.path.join(cache_dir, key)
+    return base + ".npy", base + ".json"
+
+
+def _load_resume_index(cache_dir: str, resume_hash: str, model_name: str) -> Optional[ResumeIndex]:
+    npy_path, meta_path = _index_cache_paths(cache_dir, resume_hash, model_name)
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get("resume_hash") != resume_hash or meta.get("model_name") != model_name:
+            return None
+        # Memory-map the matrix so large indexes load without copying
+        embeddings = np.load(npy_path, mmap_mode='r')
+    except (OSError, ValueError):
+        return None
+    if embeddings.shape[0] != len(meta["sections"]):
+        return None
+    return ResumeIndex(meta["sections"], meta["critical"], meta["extra"], embeddings, resume_hash, model_name,
+                       meta.get("vocabulary"))
+
+
+def _save_resume_index(index: ResumeIndex, cache_dir: str):
+    os.makedirs(cache_dir, exist_ok=True)
+    npy_path, meta_path = _index_cache_paths(cache_dir, index.resume_hash, index.model_name)
+    meta = {
+        "resume_hash": index.resume_hash,
+        "model_name": index.model_name,
+        "sections": index.sections,
+        "critical": index.critical,
+        "extra": index.extra,
+        "vocabulary": index.vocabulary,
+    }
+    try:
+        # Write both files under temp names first; the metadata is renamed last so a reader
+        # never finds metadata pointing at a half-written matrix
+        with open(npy_path + ".tmp", 'wb') as f:
+            np.save(f, np.ascontiguousarray(index.embeddings, dtype=np.float32))
+        with open(meta_path + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(npy_path + ".tmp", npy_path)
+        os.replace(meta_path + ".tmp", meta_path)
+    except OSError as e:
+        logging.warning(f"Could not save resume index to {cache_dir}: {e}")
+
+
+def build_resume_index(resume: str, cache_dir: Optional[str] = None, section_headers: Optional[List[str]] = None) -> ResumeIndex:
+    """Segment and embed a resume once, reusing a saved index for the same resume and model if present.
+
+    Args:
+        resume: Combined resume text
+        cache_dir: Directory to load/save the index from; None keeps it in memory only
+        section_headers: Optional override of the section headings to look for
+    """
+    resume_hash = hashlib.sha256(resume.encode('utf-8')).hexdigest()
+    retriever = get_retriever()
+    if cache_dir and section_headers is None:
+        with span("index_load") as record:
+            index = _load_resume_index(cache_dir, resume_hash, retriever.key)
+            record["hit"] = index is not None
+        if index is not None:
+            return index
+    with span("segment", chars=len(resume)) as record:
+        sections, critical = segment_resume(resume, section_headers)
+        extra = [_is_extra_section(s) for s in sections]
+        record["sections"] = len(sections)
     if not sections:
         logging.warning("No sections found in resume; using entire resume as fallback.")
-        sections = [resume]
+        sections, critical, extra = [resume], [False], [False]
+    with span("embed", kind="resume", items=len(sections), retriever=retriever.key):
+        embeddings, vocabulary = retriever.encode_sections(sections)
+    index = ResumeIndex(sections, critical, extra, embeddings, resume_hash, retriever.key, vocabulary)
+    if cache_dir and section_headers is None:
+        _save_resume_index(index, cache_dir)
+    return index
+
+
+def embed_jobs(jobs: List[str], batch_size: int = 64) -> np.ndarray:
+    """Encode job texts in batches with the configured retriever; one row per job.
+
+    With the embedding backend this is a normalized float32 (len(jobs), dim) matrix.
+    """
+    retriever = get_retriever()
+    with span("embed", kind="jobs", items=len(jobs), batch_size=batch_size, retriever=retriever.key):
+        return retriever.encode_queries(jobs, batch_size)
+
+
+def score_jobs(index: ResumeIndex, jobs: List[str], batch_size: int = 64,
+               job_embeddings: Optional[np.ndarray] = None) -> np.ndarray:
+    """Embed all job texts in one batched call and score them against every resume section.
+
+    Pass ``job_embeddings`` (from embed_jobs) to reuse job vectors across several resumes.
+
+    Returns:
+        A float32 (len(jobs), len(index.sections)) matrix of cosine similarities
+    """
+    if job_embeddings is None:
+        job_embeddings = embed_jobs(jobs, batch_size)
+    return get_retriever().score(job_embeddings, index.embeddings, index.vocabulary)
+
+
+def top_k_indices(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """Row-wise indices of the top_k highest scores, best first, for a (jobs, sections) matrix."""
+    k = min(top_k, scores.shape[1])
+    if k <= 0:
+        return np.empty((scores.shape[0], 0), dtype=np.int64)
+    # argpartition is O(n) per row; only the k survivors get sorted
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, part, axis=1), axis=1, kind='stable')
+    return np.take_along_axis(part, order, axis=1)
+
+
+def rank_sections_batch(index: ResumeIndex, jobs: List[str], top_k: int = 8, batch_size: int = 64,
+                        job_embeddings: Optional[np.ndarray] = None) -> List[List[str]]:
+    """Select relevant sections for many jobs at once: one embedding call, one matrix multiply.
+
+    Each job gets its top_k sections followed by any remaining extra sections, as in rank_sections.
+    """
+    if not jobs:
+        return []
+    top = top_k_indices(score_jobs(index, jobs, batch_size, job_embeddings), top_k)
+    extra_indices = [i for i, is_extra in enumerate(index.extra) if is_extra]
+    results = []
+    for row in top:
+        chosen = row.tolist()
+        chosen_set = set(chosen)
+        chosen += [i for i in extra_indices if i not in chosen_set]
+        # Compare by text as well: the segmenter can emit the same section more than once
+        selected = []
+        for i in chosen:
+            if index.sections[i] not in selected:
+                selected.append(index.sections[i])
+        results.append(selected)
+    return results
+
+
+def rank_sections(index: ResumeIndex, job: str, top_k: int = 8) -> List[str]:
+    """Return the top_k sections most similar to the job, followed by any remaining extra sections."""
+    return rank_sections_batch(index, [job], top_k)[0]
+
+
+def most_relevant_resume_sections(resume: str, job: str, section_headers: Optional[List[str]] = None, top_k: int = 8,
+                                  index: Optional[ResumeIndex] = None) -> List[str]:
+    """Split resume into granular subsections, rank by similarity to job post, and return the most relevant.
+    Automatically includes critical sections like contact info and education.
+
+    Pass a prebuilt ``index`` (see build_resume_index) to skip segmenting and embedding the resume."""
+    if not resume or not job:
+        logging.warning("Empty resume or job description provided to most_relevant_resume_sections.")
+        return [resume]
     # Embed and score
     try:
-        job_emb = _embedder.encode(job, convert_to_tensor=True)
-        section_embs = _embedder.encode(sections, convert_to_tensor=True)
-        scores = util.pytorch_cos_sim(job_emb, section_embs)[0]
-        top_indices = scores.argsort(descending=True)[:top_k]
-        selected = [sections[i] for i in top_indices]
-        for s in extra_sections:
-            if s not in selected:
-                selected.append(s)
-        return selected
+        if index is None:
+            index = build_resume_index(resume, section_headers=section_headers)
+        return rank_sections(index, job, top_k)
     except Exception as e:
         logging.error(f"Error in section embedding/scoring: {e}")
-        return sections
+        if index is not None:
+            return list(index.sections)
+        return segment_resume(resume, section_headers)[0] or [resume]
 
 
 def summarize_job_post(job: str, max_tokens: int = 128) -> str:
@@ -173,11 +388,11 @@ def summarize_job_post(job: str, max_tokens: int = 128) -> str:
     query = sentences[0] if sentences else job
     # Embed sentences and score by similarity to query
     if len(sentences) > 1:
-        query_emb = _embedder.encode(query, convert_to_tensor=True)
-        sent_embs = _embedder.encode(sentences, convert_to_tensor=True)
-        scores = util.pytorch_cos_sim(query_emb, sent_embs)[0]
+        retriever = get_retriever()
+        sent_embs, vocabulary = retriever.encode_sections(sentences)
+        scores = retriever.score(retriever.encode_queries([query]), sent_embs, vocabulary)[0]
         # Get top N most relevant sentences
-        top_indices = scores.argsort(descending=True)[:5]
+        top_indices = np.argsort(-scores, kind='stable')[:5]
         summary = ' '.join([sentences[i] for i in top_indices])
     else:
         summary = job
@@ -0,0 +1,217 @@
+# utils/segment.py
+"""
+One-pass structured resume segmenter: heading -> entries -> bullets, with character offsets.
+"""
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+import re
+
+from utils.normalize import normalize_text
+
+# Bump when segmentation output changes so saved resume indexes are rebuilt
+SEGMENTER_VERSION = 2
+
+DEFAULT_SECTION_HEADERS = [
+    "Summary", "Experience", "Work Experience", "Professional Experience",
+    "Education", "Skills", "Projects", "Certifications", "Awards"
+]
+# Sections kept whole as one chunk instead of being split into entries
+CRITICAL_SECTIONS = {"contact", "education", "certifications", "awards", "projects", "experience", "skills", "summary"}
+
+_MD_HEADING_RE = re.compile(r'(#{1,6})\s+(.*?)[\s#]*$')
+_BULLET_RE = re.compile(r'(?:[•∙⋅●]\s*|[-*]\s+|\d{1,2}[.)]\s+)(\S.*)$')
+_UNDERLINE_RE = re.compile(r'(?:-{3,}|={3,})$')
+_MIN_CHUNK_CHARS = 40
+
+
+@dataclass
+class Bullet:
+    text: str
+    start: int
+    end: int
+
+
+@dataclass
+class Entry:
+    """A job, degree or project: title/description lines followed by bullets."""
+    lines: List[str]
+    start: int
+    end: int
+    bullets: List[Bullet] = field(default_factory=list)
+
+    @property
+    def title(self) -> str:
+        return self.lines[0] if self.lines else ""
+
+    def text(self) -> str:
+        return '\n'.join(self.lines + [f"• {b.text}" for b in self.bullets])
+
+
+@dataclass
+class Section:
+    """A top-level resume section. ``heading`` is empty for text before the first heading."""
+    heading: str
+    start: int
+    end: int
+    entries: List[Entry] = field(default_factory=list)
+    is_preamble: bool = False
+
+    @property
+    def is_critical(self) -> bool:
+        # The preamble is the name/contact block
+        return self.is_preamble or any(crit in self.heading.lower() for crit in CRITICAL_SECTIONS)
+
+    def body(self) -> str:
+        return '\n'.join(e.text() for e in self.entries)
+
+    def text(self) -> str:
+        body = self.body()
+        return f"{self.heading}\n{body}" if self.heading and body else (self.heading or body)
+
+
+def _heading_text(line: str, next_line: str, known: set) -> Tuple[Optional[str], int]:
+    """Classify a stripped line as a section heading.
+
+    Returns:
+        (heading text, markdown level) where level is 0 for non-markdown headings, or
+        (None, 0) if the line is not a section heading
+    """
+    md = _MD_HEADING_RE.match(line)
+    if md:
+        return md.group(2), len(md.group(1))
+    if _BULLET_RE.match(line) or len(line) > 60:
+        return None, 0
+    if next_line and _UNDERLINE_RE.match(next_line):
+        return line, 0
+    bare = line.rstrip(':').strip()
+    if bare.lower() in known:
+        return bare, 0
+    words = bare.split()
+    if not words or len(words) > 5 or len(bare) < 4:
+        return None, 0
+    if line.endswith(':') and bare[0].isupper():
+        return bare, 0
+    if bare.isupper() and not bare.endswith('.'):
+        return bare, 0
+    return None, 0
+
+
+def parse_resume(text: str, section_headers: Optional[List[str]] = None) -> List[Section]:
+    """Scan the resume once and build a deduplicated section tree with character offsets.
+
+    Headings are markdown ``#``/``##`` lines, underlined lines, ALL CAPS lines, short
+    ``Title:`` lines and bare known section names. Inside a section, ``###`` headings and
+    non-bullet lines that follow bullets start new entries; bullet lines become Bullets
+    and lowercase lines directly after a bullet are treated as its wrapped continuation.
+    """
+    known = {h.lower() for h in (section_headers or DEFAULT_SECTION_HEADERS)}
+    lines = text.split('\n')
+    offsets = []
+    pos = 0
+    for line in lines:
+        offsets.append(pos)
+        pos += len(line) + 1
+
+    sections = [Section("", 0, 0, is_preamble=True)]
+    entry = None
+    last_bullet = None
+    skip_underline = False
+    for i, raw in enumerate(lines):
+        line = raw.strip()
+        start, end = offsets[i], offsets[i] + len(raw)
+        if skip_underline:
+            skip_underline = False
+            continue
+        if not line:
+            last_bullet = None
+            continue
+        next_line = lines[i + 1].strip() if i + 1 < len(lines) else ""
+        heading, level = _heading_text(line, next_line, known)
+        if heading is not None and level <= 2:
+            skip_underline = bool(_UNDERLINE_RE.match(next_line)) and level == 0
+            # A heading at the very top that is not a section name (a "# Jane Doe" or
+            # "JANE DOE" line) is the candidate's name: keep it in the preamble
+            at_top = len(sections) == 1 and not sections[0].entries
+            if at_top and level <= 1 and not any(crit in heading.lower() for crit in known | CRITICAL_SECTIONS):
+                entry = Entry([heading], start, end)
+                sections[0].entries.append(entry)
+                last_bullet = None
+                continue
+            sections.append(Section(heading, start, end))
+            entry = None
+            last_bullet = None
+            continue
+        section = sections[-1]
+        bullet = _BULLET_RE.match(line)
+        if heading is not None:
+            # ### sub-heading: always a new entry
+            entry = Entry([heading], start, end)
+            section.entries.append(entry)
+            last_bullet = None
+        elif bullet:
+            if entry is None:
+                entry = Entry([], start, end)
+                section.entries.append(entry)
+            last_bullet = Bullet(bullet.group(1).strip(), start, end)
+            entry.bullets.append(last_bullet)
+        elif last_bullet is not None and line[0].islower():
+            last_bullet.text += ' ' + line
+            last_bullet.end = end
+        elif entry is None or entry.bullets:
+            entry = Entry([line], start, end)
+            section.entries.append(entry)
+            last_bullet = None
+        else:
+            entry.lines.append(line)
+        entry.end = end
+        section.end = end
+
+    for section in sections:
+        if section.entries:
+            section.end = max(section.end, section.entries[-1].end)
+    return [s for s in sections if s.entries or (s.heading and not s.is_preamble)]
+
+
+def section_chunks(sections: List[Section]) -> Tuple[List[str], List[bool]]:
+    """Flatten a section tree into retrieval chunks.
+
+    Critical sections (contact, education, experience, ...) become one chunk each; other
+    sections become one chunk per entry, prefixed with the section heading. Chunk text is
+    normalized with • bullets, ready to drop into a prompt.
+
+    Returns:
+        Chunk texts and, for each, whether it came from a critical section
+    """
+    chunks = []
+    critical = []
+    seen = set()
+
+    def add(text, is_critical, min_chars=_MIN_CHUNK_CHARS):
+        text = normalize_text(text, bullet='• ', max_blank_lines=0)
+        if len(text) > min_chars and text not in seen:
+            seen.add(text)
+            chunks.append(text)
+            critical.append(is_critical)
+
+    for section in sections:
+        if section.is_preamble:
+            # Name and contact details are short but always worth keeping
+            add(section.text(), True, min_chars=0)
+        elif section.is_critical:
+            add(section.text(), True)
+        else:
+            for entry in section.entries:
+                add(f"{section.heading}\n{entry.text()}" if section.heading else entry.text(), False)
+    return chunks, critical
+
+
+def paragraph_chunks(text: str) -> List[str]:
+    """Fallback for documents without headings: blank-line separated paragraphs."""
+    chunks = []
+    seen = set()
+    for para in re.split(r'\n[^\S\n]*\n', text.replace('\f', '\n')):
+        para = normalize_text(para, bullet='• ', max_blank_lines=0)
+        if len(para) > _MIN_CHUNK_CHARS and para not in seen:
+            seen.add(para)
+            chunks.append(para)
+    return chunks
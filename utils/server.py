@@ -0,0 +1,258 @@
+# utils/server.py
+"""
+Long-running generation server: the embedding model, resume indexes and render stack stay
+loaded between requests.
+
+Endpoints:
+    POST /generate  JSON {"job": "<posting text>", "candidate": "alice", "format": "pdf" | "html",
+                    "name": "backend.txt"}; answers with the PDF or HTML
+    GET  /healthz   JSON status, queue depth and loaded candidates
+    GET  /metrics   Counters and gauges in the Prometheus text format
+
+Requests wait in a bounded queue served by a fixed number of worker threads. When the
+queue is full the server answers 429 with Retry-After instead of piling up work.
+"""
+import json
+import logging
+import os
+import queue
+import socket
+import socketserver
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from utils.metrics import span
+
+OUTPUT_FORMATS = ("pdf", "html")
+# Largest request body accepted, in bytes
+MAX_BODY_BYTES = 2 * 1024 * 1024
+
+
+class BadRequest(Exception):
+    """Raised by a generate callback for a request it cannot serve; answered with 400."""
+
+
+class UnknownCandidate(Exception):
+    """Raised by a generate callback for a candidate it does not know; answered with 404."""
+
+
+class GenerationHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        logging.debug(f"{self.command} {self.path}: " + format % args)
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: dict = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: int, payload: dict, headers: dict = None):
+        self._send(status, json.dumps(payload).encode('utf-8'), "application/json", headers)
+
+    def do_GET(self):
+        path = self.path.split('?', 1)[0].rstrip('/')
+        if path == "/healthz":
+            self._send_json(200, self.server.health())
+        elif path == "/metrics":
+            self._send(200, self.server.metrics_text().encode('utf-8'), "text/plain; version=0.0.4")
+        else:
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        if self.path.split('?', 1)[0].rstrip('/') != "/generate":
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            self._send_json(413, {"error": f"Request body over {MAX_BODY_BYTES} bytes"})
+            return
+        server = self.server
+        start = time.perf_counter()
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+            job = request["job"]
+            fmt = request.get("format", "pdf")
+            if not isinstance(job, str) or not job.strip():
+                raise ValueError("'job' must be non-empty text")
+            if fmt not in OUTPUT_FORMATS:
+                raise ValueError(f"'format' must be one of {', '.join(OUTPUT_FORMATS)}")
+            if not isinstance(request.get("candidate") or "", str) or not isinstance(request.get("name") or "", str):
+                raise ValueError("'candidate' and 'name' must be text")
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            server.count("bad_request")
+            self._send_json(400, {"error": f"Malformed request: {e}"})
+            return
+        try:
+            future = server.submit(job, request.get("candidate"), fmt, request.get("name") or "job.txt")
+        except queue.Full:
+            server.count("rejected")
+            self._send_json(429, {"error": "Server busy, retry later"}, {"Retry-After": "1"})
+            return
+        try:
+            content_type, body = future.result(timeout=server.request_timeout)
+        except FutureTimeout:
+            # Drop it if it is still queued; a request already running finishes in the background
+            future.cancel()
+            server.count("timeout")
+            self._send_json(504, {"error": f"Generation took over {server.request_timeout:.0f}s"})
+            return
+        except UnknownCandidate as e:
+            server.count("not_found")
+            self._send_json(404, {"error": f"Unknown candidate {e}"})
+            return
+        except BadRequest as e:
+            server.count("bad_request")
+            self._send_json(400, {"error": str(e)})
+            return
+        except Exception as e:
+            logging.error(f"Generation failed: {e}")
+            server.count("failed")
+            self._send_json(502, {"error": str(e)})
+            return
+        server.count("ok", time.perf_counter() - start)
+        self._send(200, body, content_type)
+
+
+class GenerationServer(ThreadingHTTPServer):
+    """HTTP front end with a bounded work queue in front of ``workers`` generation threads.
+
+    ``generate(job, candidate, fmt, name)`` does the work and returns (content type, body
+    bytes); it may raise UnknownCandidate or BadRequest. Any other exception is answered with 502.
+    ``extra_metrics`` returns further {name: value} metrics for /metrics (cache stats, ...); names
+    ending in _total are exported as counters, the rest as gauges.
+    """
+    daemon_threads = True
+
+    def __init__(self, address, generate, workers: int = 1, queue_size: int = 16, request_timeout: float = 300,
+                 candidates: list = None, extra_metrics=None):
+        self.generate = generate
+        self.request_timeout = request_timeout
+        self.candidates = list(candidates or [])
+        self.extra_metrics = extra_metrics
+        self.queue = queue.Queue(maxsize=max(queue_size, 1))
+        self.workers = max(workers, 1)
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._counts = {"ok": 0, "failed": 0, "rejected": 0, "timeout": 0, "bad_request": 0, "not_found": 0}
+        self._seconds_total = 0.0
+        super().__init__(address, GenerationHandler)
+        self._worker_threads = [threading.Thread(target=self._work, name=f"generate-{i}", daemon=True)
+                         for i in range(self.workers)]
+        for thread in self._worker_threads:
+            thread.start()
+
+    def submit(self, job: str, candidate: str, fmt: str, name: str) -> Future:
+        """Queue one request; raises queue.Full when the queue is at capacity."""
+        future = Future()
+        self.queue.put_nowait((future, (job, candidate, fmt, name)))
+        return future
+
+    def _work(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            future, args = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            with self._lock:
+                self._in_flight += 1
+            try:
+                with span("serve", candidate=args[1], format=args[2], job=args[3]):
+                    future.set_result(self.generate(*args))
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+
+    def count(self, outcome: str, seconds: float = None):
+        with self._lock:
+            self._counts[outcome] += 1
+            if seconds is not None:
+                self._seconds_total += seconds
+
+    def health(self) -> dict:
+        with self._lock:
+            in_flight = self._in_flight
+        return {"status": "ok", "uptime_seconds": round(time.time() - self.started, 1), "workers": self.workers,
+                "in_flight": in_flight, "queued": self.queue.qsize(), "queue_size": self.queue.maxsize,
+                "candidates": self.candidates}
+
+    def metrics_text(self) -> str:
+        with self._lock:
+            counts = dict(self._counts)
+            seconds_total = self._seconds_total
+            in_flight = self._in_flight
+        lines = ["# TYPE resume_requests_total counter"]
+        lines += [f'resume_requests_total{{outcome="{outcome}"}} {n}' for outcome, n in counts.items()]
+        lines += [
+            "# TYPE resume_request_seconds_total counter",
+            f"resume_request_seconds_total {seconds_total:.6f}",
+            "# TYPE resume_queue_depth gauge",
+            f"resume_queue_depth {self.queue.qsize()}",
+            "# TYPE resume_queue_capacity gauge",
+            f"resume_queue_capacity {self.queue.maxsize}",
+            "# TYPE resume_in_flight gauge",
+            f"resume_in_flight {in_flight}",
+            "# TYPE resume_workers gauge",
+            f"resume_workers {self.workers}",
+            "# TYPE resume_uptime_seconds gauge",
+            f"resume_uptime_seconds {time.time() - self.started:.1f}",
+        ]
+        for name, value in (self.extra_metrics() if self.extra_metrics else {}).items():
+            if value is not None:
+                # Prometheus convention: *_total names are monotonically increasing counters
+                kind = "counter" if name.endswith("_total") else "gauge"
+                lines += [f"# TYPE resume_{name} {kind}", f"resume_{name} {value}"]
+        return '\n'.join(lines) + '\n'
+
+    def server_close(self):
+        # Cancel whatever is still queued, then stop the workers once their current request is done
+        while True:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                item[0].cancel()
+        for _ in self._worker_threads:
+            self.queue.put(None)
+        super().server_close()
+
+
+class UnixGenerationServer(GenerationServer):
+    """GenerationServer listening on a Unix domain socket path instead of a TCP port."""
+    address_family = socket.AF_UNIX
+
+    def server_bind(self):
+        # A socket file left by an earlier run would make bind fail
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+        socketserver.TCPServer.server_bind(self)
+        self.server_name = "localhost"
+        self.server_port = 0
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.remove(self.server_address)
+        except OSError:
+            pass
+
+
+def make_server(address: str, generate, **kwargs) -> GenerationServer:
+    """GenerationServer for "host:port", ":port", or a Unix socket path (anything containing "/")."""
+    if '/' in address:
+        return UnixGenerationServer(address, generate, **kwargs)
+    host, _, port = address.rpartition(':')
+    return GenerationServer((host or "127.0.0.1", int(port)), generate, **kwargs)
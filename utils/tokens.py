@@ -0,0 +1,56 @@
+# utils/tokens.py
+"""
+Token counting and budget packing with one cached tokenizer per model.
+"""
+from functools import lru_cache
+from typing import List, Tuple
+import re
+
+# Encoding used for models tiktoken does not know about
+FALLBACK_ENCODING = "o200k_base"
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model: str):
+    """Return the tiktoken encoder for ``model``, loading it once per process."""
+    import tiktoken
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding(FALLBACK_ENCODING)
+
+
+def count_tokens(text: str, model: str = "gpt-4o") -> int:
+    return len(get_encoding(model).encode(text, disallowed_special=()))
+
+
+def pack_by_budget(items: List[str], budget: int, model: str = "gpt-4o") -> Tuple[List[str], List[int], List[bool]]:
+    """Greedily keep items, in the given (relevance) order, while they fit in ``budget`` tokens.
+
+    An item that does not fit is skipped and smaller items after it are still tried.
+
+    Returns:
+        The kept items, the token count of every input item and whether each one was kept
+    """
+    kept = []
+    counts = []
+    flags = []
+    used = 0
+    for item in items:
+        tokens = count_tokens(item, model)
+        counts.append(tokens)
+        fits = used + tokens <= budget
+        flags.append(fits)
+        if fits:
+            kept.append(item)
+            used += tokens
+    return kept, counts, flags
+
+
+def trim_to_budget(text: str, budget: int, model: str = "gpt-4o") -> str:
+    """Keep whole paragraphs of ``text`` that fit in ``budget`` tokens, packed in order like pack_by_budget."""
+    if not text or count_tokens(text, model) <= budget:
+        return text
+    paragraphs = [p.strip() for p in re.split(r'\n\s*\n', text) if p.strip()]
+    kept, _, _ = pack_by_budget(paragraphs, budget, model)
+    return '\n\n'.join(kept)
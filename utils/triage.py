@@ -0,0 +1,92 @@
+# utils/triage.py
+"""
+Job triage: rank every posting by how well the resume fits it, without calling the LLM.
+
+All postings are embedded in batches and scored against the resume index in one matrix
+multiply (see utils.rag.score_jobs), so thousands of postings take seconds. The ranked list
+can be written as a CSV or JSON report and used to generate only the best matches.
+"""
+import csv
+import json
+import os
+import tempfile
+from typing import List, Optional
+
+import numpy as np
+
+from utils.metrics import span
+from utils.rag import ResumeIndex, score_jobs, top_k_indices
+
+TRIAGE_FIELDS = ["rank", "job", "score", "best_score", "best_section"]
+
+
+def _section_label(section: str, width: int = 80) -> str:
+    first_line = next((line.strip() for line in section.split('\n') if line.strip()), "")
+    return first_line[:width]
+
+
+def triage_jobs(index: ResumeIndex, jobs: list, batch_size: int = 64, top_sections: int = 3,
+                job_embeddings: Optional[np.ndarray] = None) -> List[dict]:
+    """Score every job against the resume and rank them, best fit first.
+
+    A job's score is the mean cosine similarity of its ``top_sections`` best-matching resume
+    sections, so one lucky match does not outrank broad overlap.
+
+    Args:
+        index: Resume index from build_resume_index
+        jobs: (job file name, job text) pairs
+        batch_size: Job postings embedded per call
+        top_sections: Number of best sections averaged into the score
+        job_embeddings: Precomputed rows matching ``jobs`` (see utils.rag.embed_jobs)
+
+    Returns:
+        One dict per job with the keys in TRIAGE_FIELDS, sorted by score
+    """
+    if not jobs:
+        return []
+    with span("triage", jobs=len(jobs), sections=len(index.sections)):
+        scores = score_jobs(index, [job_text for _, job_text in jobs], batch_size, job_embeddings)
+        top = top_k_indices(scores, top_sections)
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        fit = top_scores.mean(axis=1)
+        order = np.argsort(-fit, kind='stable')
+    rows = []
+    for rank, i in enumerate(order.tolist(), start=1):
+        rows.append({
+            "rank": rank,
+            "job": jobs[i][0],
+            "score": round(float(fit[i]), 4),
+            "best_score": round(float(top_scores[i, 0]), 4),
+            "best_section": _section_label(index.sections[top[i, 0]]),
+        })
+    return rows
+
+
+def select_jobs(rows: List[dict], top: Optional[int] = None, min_score: Optional[float] = None) -> List[str]:
+    """Names of the ranked jobs kept by ``top`` (best N) and ``min_score``, best first."""
+    kept = [row for row in rows if min_score is None or row["score"] >= min_score]
+    if top is not None:
+        kept = kept[:max(top, 0)]
+    return [row["job"] for row in kept]
+
+
+def write_triage_report(path: str, rows: List[dict]):
+    """Write the ranking as JSON if ``path`` ends in .json, otherwise as CSV, atomically."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+            if path.lower().endswith('.json'):
+                json.dump(rows, f, ensure_ascii=False, indent=2)
+            else:
+                writer = csv.DictWriter(f, fieldnames=TRIAGE_FIELDS)
+                writer.writeheader()
+                writer.writerows(rows)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,152 @@
+# utils/watch.py
+"""
+Directory watcher for --watch: reports job files that are new or modified once they stop changing.
+
+On Linux, inotify (through libc, no extra dependency) wakes the watcher as soon as a file
+is written or renamed into place; elsewhere, or if inotify is unavailable, the directory
+is polled. Either way a file is only reported after its size and mtime have been stable
+for the debounce period, so a posting that is still being written is never read half-way.
+"""
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import stat
+import struct
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# inotify event masks, from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+_EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, name length
+# Editors and downloaders write to names like these before renaming into place
+_TEMP_SUFFIXES = (".tmp", ".part", ".crdownload", ".swp", "~")
+
+
+def is_job_file(name: str) -> bool:
+    """Names read_job_files would read, minus hidden and temporary files."""
+    return bool(os.path.splitext(name)[1]) and not name.startswith('.') and not name.lower().endswith(_TEMP_SUFFIXES)
+
+
+class _Inotify:
+    """Minimal inotify reader for one directory."""
+
+    def __init__(self, directory: str):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch failed for {directory}")
+
+    def read(self, timeout: float) -> Optional[List[str]]:
+        """Names with events within ``timeout`` seconds; None if the kernel queue overflowed."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        names = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            _, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            if mask & IN_Q_OVERFLOW:
+                return None
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if name:
+                names.append(os.fsdecode(name))
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+
+class JobWatcher:
+    """Yields batches of job file names in ``directory`` that are new or modified and have settled.
+
+    Files present when the watcher starts are treated as already handled.
+    """
+
+    def __init__(self, directory: str, debounce: float = 1.0, poll_interval: float = 2.0, use_inotify: bool = True):
+        self.directory = directory
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self._inotify = None
+        if use_inotify and hasattr(select, "select"):
+            try:
+                self._inotify = _Inotify(directory)
+            except (OSError, AttributeError) as e:
+                # AttributeError: libc without inotify (macOS, ...)
+                logging.info(f"inotify unavailable, polling {directory} instead: {e}")
+        self.method = "inotify" if self._inotify is not None else f"polling every {poll_interval:g}s"
+        self._known: Dict[str, Tuple[int, int]] = {}
+        self._changed: Dict[str, float] = {}
+        for name in self._list():
+            signature = self._signature(name)
+            if signature is not None:
+                self._known[name] = signature
+
+    def _list(self) -> List[str]:
+        try:
+            return [name for name in os.listdir(self.directory) if is_job_file(name)]
+        except OSError as e:
+            logging.error(f"Error listing {self.directory}: {e}")
+            return []
+
+    def _signature(self, name: str) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(os.path.join(self.directory, name))
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size) if stat.S_ISREG(st.st_mode) else None
+
+    def _check(self, names: List[str], now: float):
+        """Re-stat ``names``; any whose size or mtime moved restart their debounce timer."""
+        for name in names:
+            if not is_job_file(name):
+                continue
+            signature = self._signature(name)
+            if signature is None:
+                self._known.pop(name, None)
+                self._changed.pop(name, None)
+            elif signature != self._known.get(name):
+                self._known[name] = signature
+                self._changed[name] = now
+
+    def changes(self) -> Iterator[List[str]]:
+        """Block and yield sorted lists of settled file names, forever."""
+        while True:
+            if self._inotify is not None:
+                # Wake for new events, or when the oldest pending file's debounce ends
+                timeout = self.poll_interval
+                if self._changed:
+                    timeout = max(0.0, min(self._changed.values()) + self.debounce - time.monotonic())
+                names = self._inotify.read(timeout)
+                # On overflow, fall back to a full rescan; pending files are re-stat'ed either way
+                self._check(self._list() if names is None else names + list(self._changed), time.monotonic())
+            else:
+                time.sleep(min(self.poll_interval, self.debounce) if self._changed else self.poll_interval)
+                self._check(self._list(), time.monotonic())
+            now = time.monotonic()
+            settled = sorted(name for name, changed in self._changed.items() if now - changed >= self.debounce)
+            for name in settled:
+                del self._changed[name]
+            if settled:
+                yield settled
+
+    def close(self):
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None